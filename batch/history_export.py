@@ -0,0 +1,166 @@
+"""배치 실행별 공고 이력을 컬럼형(Arrow IPC) 파일로 저장하고 읽습니다.
+
+{HISTORY_EXPORT_DIR}/{dataset}/run_date=YYYY-MM-DD/{HHMMSS}.arrow
+- lh_notices: LH 공고 (공급정보 제외 스칼라 필드 + 공급 행 수 + 첨부파일)
+- lh_supply: LH 공급정보 행 (표준 필드 보증금/임대료/면적/세대수/주택형 + 원본 행 JSON)
+- ih_notices: IH 공고 (API 필드 + 첨부파일)
+비압축 IPC 파일이라 read_history()는 memory map으로 읽습니다 (API 호출 없음).
+pyarrow가 없으면 저장·조회를 건너뜁니다.
+"""
+import json
+import logging
+import os
+from datetime import date, datetime
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+from config import HISTORY_EXPORT_DIR
+from supply_store import NUMERIC_FIELDS, detect_columns, parse_number
+
+logger = logging.getLogger(__name__)
+
+DATASETS = ("lh_notices", "lh_supply", "ih_notices")
+
+_PARTITION_PREFIX = "run_date="
+_EXCLUDED_NOTICE_KEYS = {"supply_columns", "supply_details", "_pdf_urls"}
+
+
+def _pdf_type():
+    return pa.list_(pa.struct([("name", pa.string()), ("url", pa.string())]))
+
+
+def _notice_table(notices: list[dict], run_at: datetime):
+    """공고 dict 목록 → Table. 스칼라 필드는 문자열 컬럼 (컬럼 집합은 실행마다 달라질 수 있음)."""
+    keys: dict[str, None] = {}
+    for n in notices:
+        for k, v in n.items():
+            if k not in _EXCLUDED_NOTICE_KEYS and not isinstance(v, (dict, list)):
+                keys.setdefault(k)
+    columns = {
+        k: pa.array([None if n.get(k) is None else str(n.get(k)) for n in notices], type=pa.string())
+        for k in keys
+    }
+    if any("supply_details" in n for n in notices):
+        columns["supply_rows"] = pa.array([len(n.get("supply_details") or []) for n in notices], type=pa.int32())
+    columns["pdf_urls"] = pa.array(
+        [[{"name": f.get("name", ""), "url": f.get("url", "")} for f in n.get("_pdf_urls") or []] for n in notices],
+        type=_pdf_type(),
+    )
+    columns["run_at"] = pa.array([run_at] * len(notices), type=pa.timestamp("s"))
+    return pa.table(columns)
+
+
+def _supply_table(notices: list[dict], run_at: datetime):
+    """LH 공고의 supply_details를 행 단위로 평탄화."""
+    rows: dict[str, list] = {
+        "PAN_ID": [], "row_no": [], **{f: [] for f in NUMERIC_FIELDS}, "house_type": [], "raw": [],
+    }
+    for n in notices:
+        details = n.get("supply_details") or []
+        if not details:
+            continue
+        labels = n.get("supply_columns") or {}
+        cols = detect_columns(labels, details[0])
+        for i, d in enumerate(details):
+            rows["PAN_ID"].append(n.get("PAN_ID", ""))
+            rows["row_no"].append(i)
+            for f in NUMERIC_FIELDS:
+                key, scale = cols.get(f, (None, 1.0))
+                value = parse_number(d.get(key)) * scale if key else float("nan")
+                rows[f].append(None if value != value else value)
+            key = cols.get("house_type", (None,))[0]
+            rows["house_type"].append(str(d.get(key) or "").strip() if key else "")
+            # 원본 행은 라벨 기준으로 보존 (컬럼 구성이 공고마다 다름)
+            rows["raw"].append(json.dumps({labels.get(k, k): v for k, v in d.items()}, ensure_ascii=False))
+    return pa.table({
+        "PAN_ID": pa.array(rows["PAN_ID"], type=pa.string()),
+        "row_no": pa.array(rows["row_no"], type=pa.int32()),
+        **{f: pa.array(rows[f], type=pa.float64()) for f in NUMERIC_FIELDS},
+        "house_type": pa.array(rows["house_type"], type=pa.string()),
+        "raw": pa.array(rows["raw"], type=pa.string()),
+        "run_at": pa.array([run_at] * len(rows["PAN_ID"]), type=pa.timestamp("s")),
+    })
+
+
+def _write_table(dataset: str, table, run_at: datetime) -> str:
+    """run_date 파티션 디렉토리에 비압축 IPC 파일로 원자적 저장 (임시 파일 → rename)."""
+    part_dir = os.path.join(HISTORY_EXPORT_DIR, dataset, f"{_PARTITION_PREFIX}{run_at:%Y-%m-%d}")
+    os.makedirs(part_dir, exist_ok=True)
+    path = os.path.join(part_dir, f"{run_at:%H%M%S}.arrow")
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+
+def export_run(
+    lh_notices: list[dict] | None,
+    ih_notices: list[dict] | None,
+    run_at: datetime | None = None,
+) -> dict[str, int]:
+    """실행 1회의 공고 전체를 데이터셋별로 저장하고 {dataset: 행 수}를 반환.
+
+    None인 소스(조회 실패)는 건너뜁니다. 비활성화·pyarrow 미설치 시 빈 dict.
+    """
+    if not HISTORY_EXPORT_DIR:
+        return {}
+    if pa is None:
+        logger.warning("pyarrow 미설치 — 공고 이력 저장 건너뜀")
+        return {}
+
+    run_at = (run_at or datetime.now()).replace(microsecond=0)
+    tables = {}
+    if lh_notices is not None:
+        tables["lh_notices"] = _notice_table(lh_notices, run_at)
+        tables["lh_supply"] = _supply_table(lh_notices, run_at)
+    if ih_notices is not None:
+        tables["ih_notices"] = _notice_table(ih_notices, run_at)
+
+    written = {}
+    for dataset, table in tables.items():
+        path = _write_table(dataset, table, run_at)
+        written[dataset] = table.num_rows
+        logger.info(f"공고 이력 저장: {dataset} {table.num_rows}행 → {path}")
+    return written
+
+
+def read_history(dataset: str, start: date | None = None, end: date | None = None, columns: list[str] | None = None):
+    """start~end(포함) run_date 파티션의 파일을 memory map으로 읽어 하나의 Table로 반환.
+
+    실행마다 공고 컬럼 구성이 다를 수 있어 스키마를 합쳐(promote) 연결하며,
+    파티션 값은 run_date(date32) 컬럼으로 추가됩니다.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow 미설치 — 공고 이력 조회 불가")
+    if dataset not in DATASETS:
+        raise ValueError(f"dataset은 {', '.join(DATASETS)} 중 하나여야 합니다: {dataset}")
+
+    base = os.path.join(HISTORY_EXPORT_DIR, dataset)
+    tables = []
+    for part in sorted(os.listdir(base)) if os.path.isdir(base) else []:
+        if not part.startswith(_PARTITION_PREFIX):
+            continue
+        try:
+            run_date = date.fromisoformat(part[len(_PARTITION_PREFIX):])
+        except ValueError:
+            continue
+        if (start and run_date < start) or (end and run_date > end):
+            continue
+        part_dir = os.path.join(base, part)
+        for name in sorted(os.listdir(part_dir)):
+            if not name.endswith(".arrow"):
+                continue
+            with pa.memory_map(os.path.join(part_dir, name), "r") as source:
+                table = pa.ipc.open_file(source).read_all()
+            if columns:
+                table = table.select([c for c in columns if c in table.column_names])
+            tables.append(table.append_column("run_date", pa.array([run_date] * table.num_rows, type=pa.date32())))
+
+    if not tables:
+        return pa.table({})
+    return pa.concat_tables(tables, promote_options="default")
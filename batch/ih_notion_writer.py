@@ -9,8 +9,9 @@ import logging
 from datetime import datetime, timezone
 from ih_api import normalize_link
 from .notion_base import (
-    get_notion_client, rich_text, select, query_db, paginate_query,
-    get_or_create_database,
+    get_notion_client, rich_text, select, query_db,
+    get_or_create_database, gather_limited, notion_priority, PRIORITY_LOW,
+    FINGERPRINT_PROPERTY, property_fingerprint, plain_text, load_page_map,
 )
 
 logger = logging.getLogger(__name__)
@@ -28,6 +29,7 @@ DB_PROPERTIES = {
     "상태":     {"select": {}},
     "수집일시": {"date": {}},
     "첨부파일":  {"files": {}},
+    FINGERPRINT_PROPERTY: {"rich_text": {}},
 }
 
 
@@ -57,17 +59,23 @@ def _build_properties(notice: dict, collected_at: str) -> dict:
 # ---------------------------------------------------------------------------
 # 페이지 캐시 빌드
 # ---------------------------------------------------------------------------
+def _page_entry(page: dict) -> tuple[str, dict] | None:
+    """페이지 → (정규화 link, {"id", "status", "prop_hash"}) (link 없으면 None)."""
+    props = page.get("properties", {})
+    link = normalize_link(props.get("링크", {}).get("url", "") or "")
+    if not link:
+        return None
+    status_sel = props.get("상태", {}).get("select")
+    status = status_sel.get("name", "") if status_sel else ""
+    return link, {"id": page["id"], "status": status, "prop_hash": plain_text(props.get(FINGERPRINT_PROPERTY))}
+
+
 async def _get_all_link_page_map(db_id: str) -> dict[str, dict]:
-    """Notion DB의 모든 페이지를 {link: {"id": page_id, "status": str}} 형태로 반환."""
-    pages = {}
-    for page in await paginate_query(db_id):
-        props = page.get("properties", {})
-        link = normalize_link(props.get("링크", {}).get("url", "") or "")
-        if link:
-            status_sel = props.get("상태", {}).get("select")
-            status = status_sel.get("name", "") if status_sel else ""
-            pages[link] = {"id": page["id"], "status": status}
-    return pages
+    """Notion DB의 모든 페이지를 {link: {"id": page_id, "status": str, "prop_hash": str}} 형태로 반환.
+
+    로컬 미러를 증분 동기화하여 마지막 실행 이후 수정된 페이지만 조회합니다.
+    """
+    return await load_page_map(db_id, _page_entry)
 
 
 # ---------------------------------------------------------------------------
@@ -91,15 +99,26 @@ async def close_expired_notices(
             return 0
 
     notion = get_notion_client()
-    closed = 0
+    expired = {
+        link: info["id"] for link, info in page_cache.items()
+        if link not in active_links and info["status"] != "마감"
+    }
 
-    for link, info in page_cache.items():
-        if link not in active_links and info["status"] != "마감":
+    async def _close(link: str, page_id: str) -> bool:
+        try:
             await notion.pages.update(
-                page_id=info["id"],
-                properties={"상태": select("마감")},
+                page_id=page_id,
+                # 속성 해시를 비워 공고가 다시 나타나면 반드시 갱신되도록 함
+                properties={"상태": select("마감"), FINGERPRINT_PROPERTY: {"rich_text": []}},
             )
-            closed += 1
+            return True
+        except Exception as e:
+            logger.error(f"  [오류] 마감 처리 실패 ({link}): {e}")
+            return False
+
+    with notion_priority(PRIORITY_LOW):
+        results = await gather_limited(_close(link, page_id) for link, page_id in expired.items())
+    closed = sum(results)
 
     if closed:
         logger.info(f"IH 만료 처리: {closed}건")
@@ -109,11 +128,17 @@ async def close_expired_notices(
 # ---------------------------------------------------------------------------
 # Upsert
 # ---------------------------------------------------------------------------
-async def upsert_notice(db_id: str, notice: dict, page_cache: dict[str, dict] | None = None):
-    """공고 1건을 Notion DB에 upsert합니다."""
+async def upsert_notice(db_id: str, notice: dict, page_cache: dict[str, dict] | None = None) -> str:
+    """공고 1건을 Notion DB에 upsert합니다. 속성 해시가 page_cache와 같으면 API 호출 없이 건너뜁니다.
+
+    Returns:
+        str: "new" | "updated" | "unchanged"
+    """
     notion = get_notion_client()
     collected_at = datetime.now(tz=timezone.utc).isoformat()
     properties = _build_properties(notice, collected_at)
+    prop_hash = property_fingerprint(properties)
+    properties[FINGERPRINT_PROPERTY] = {"rich_text": rich_text(prop_hash)}
 
     link = notice.get("link", "")
     title = notice.get("sj", "")
@@ -122,6 +147,7 @@ async def upsert_notice(db_id: str, notice: dict, page_cache: dict[str, dict] |
         info = page_cache.get(link)
         existing_page_id = info["id"] if info else None
     else:
+        info = None
         if link:
             result = await query_db(db_id, {
                 "filter": {"property": "링크", "url": {"equals": link}}
@@ -132,56 +158,76 @@ async def upsert_notice(db_id: str, notice: dict, page_cache: dict[str, dict] |
             existing_page_id = None
 
     if existing_page_id:
+        if info and info.get("prop_hash") == prop_hash:
+            logger.debug(f"  [변경없음] {title}")
+            return "unchanged"
         await notion.pages.update(page_id=existing_page_id, properties=properties)
         logger.info(f"  [업데이트] {title}")
-        return False
+        return "updated"
     else:
         await notion.pages.create(
             parent={"type": "database_id", "database_id": db_id},
             properties=properties,
         )
         logger.info(f"  [신규등록] {title}")
-        return True
+        return "new"
 
 
-async def upsert_all(notices: list[dict]) -> dict:
-    """공고 목록 전체를 Notion DB에 upsert합니다.
-
-    Returns:
-        dict: {"new": int, "updated": int, "closed": int, "failed": int, "new_notices": list}
-    """
-    db_id = await get_or_create_database("IH_NOTION_DATABASE_ID", DB_NAME, DB_PROPERTIES)
+class UpsertSession:
+    """공고를 1건씩 upsert하고 마지막에 마감 처리하는 저장 세션 (LH notion_writer.UpsertSession과 동일)."""
 
-    logger.info("IH Notion DB 전체 조회 중...")
-    page_cache = await _get_all_link_page_map(db_id)
-    logger.info(f"기존 등록 공고 수: {len(page_cache)}건")
+    def __init__(self):
+        self.db_id = ""
+        self.page_cache: dict[str, dict] = {}
+        self.counts = {"new": 0, "updated": 0, "unchanged": 0}
+        self.new_notices: list[dict] = []
+        self.failed_notices: list[dict] = []
 
-    new, updated, failed = 0, 0, 0
-    new_notices: list[dict] = []
-    failed_notices: list[dict] = []
+    async def open(self) -> None:
+        self.db_id = await get_or_create_database("IH_NOTION_DATABASE_ID", DB_NAME, DB_PROPERTIES)
+        logger.info("IH Notion DB 페이지 캐시 동기화 중...")
+        self.page_cache = await _get_all_link_page_map(self.db_id)
+        logger.info(f"기존 등록 공고 수: {len(self.page_cache)}건")
 
-    for notice in notices:
+    async def upsert(self, notice: dict) -> None:
         try:
-            is_new = await upsert_notice(db_id, notice, page_cache=page_cache)
-            if is_new:
-                new += 1
-                new_notices.append(notice)
-            else:
-                updated += 1
+            outcome = await upsert_notice(self.db_id, notice, page_cache=self.page_cache)
         except Exception as e:
             logger.error(f"  [오류] {notice.get('sj', '?')}: {e}")
-            failed += 1
-            failed_notices.append({
+            self.failed_notices.append({
                 "sj": notice.get("sj", ""),
                 "link": notice.get("link", ""),
                 "error": str(e),
             })
+            return
+        self.counts[outcome] += 1
+        if outcome == "new":
+            self.new_notices.append(notice)
+
+    async def finish(self, notices: list[dict]) -> dict:
+        """notices(이번 실행의 전체 공고)에 없는 모집중 공고를 마감 처리하고 결과를 반환."""
+        active_links = {n.get("link") for n in notices if n.get("link")}
+        closed = await close_expired_notices(active_links, self.page_cache)
+
+        failed = len(self.failed_notices)
+        logger.info(
+            f"IH Notion 저장 완료 - 신규: {self.counts['new']}, 업데이트: {self.counts['updated']}, "
+            f"변경없음: {self.counts['unchanged']}, 마감: {closed}, 실패: {failed}"
+        )
+        return {
+            **self.counts, "closed": closed, "failed": failed,
+            "new_notices": self.new_notices, "failed_notices": self.failed_notices,
+        }
 
-    active_links = {n.get("link") for n in notices if n.get("link")}
-    closed = await close_expired_notices(active_links, page_cache)
 
-    logger.info(f"IH Notion 저장 완료 - 신규: {new}, 업데이트: {updated}, 마감: {closed}, 실패: {failed}")
-    return {
-        "new": new, "updated": updated, "closed": closed, "failed": failed,
-        "new_notices": new_notices, "failed_notices": failed_notices,
-    }
+async def upsert_all(notices: list[dict]) -> dict:
+    """공고 목록 전체를 Notion DB에 upsert합니다.
+
+    Returns:
+        dict: {"new": int, "updated": int, "unchanged": int, "closed": int, "failed": int, "new_notices": list}
+    """
+    session = UpsertSession()
+    await session.open()
+    # 공고별 upsert를 동시에 진행 (요청 속도는 Notion 스케줄러가 제한)
+    await gather_limited(session.upsert(n) for n in notices)
+    return await session.finish(notices)
@@ -4,15 +4,21 @@ import os
 import sys
 import time
 from datetime import datetime, timedelta
-import httpx
 
-from config import validate_env, LH_TP_CODES, TARGET_REGION, NATIONWIDE_AIS_CODES, EXCLUDE_SUBREGIONS
-from lh_api import fetch_lh_notices, dedup_by_pan_id, filter_region_relevant, exclude_subregions
-from .notion_writer import upsert_all as lh_upsert_all
+from config import (
+    validate_env, LH_TP_CODES, TARGET_REGION, NATIONWIDE_AIS_CODES, EXCLUDE_SUBREGIONS, BATCH_SINKS,
+    PIPELINE_SUPPLY_WORKERS, PIPELINE_SCRAPE_WORKERS, PIPELINE_UPSERT_WORKERS,
+)
+from lh_api import fetch_all_lh_notices, enrich_supply_one, dedup_by_pan_id, filter_region_relevant, exclude_subregions
 from ih_api import fetch_all_ih_notices
-from .ih_notion_writer import upsert_all as ih_upsert_all
+from .sinks import NoticeSink, StoreSession, get_sinks
+from .pipeline import Stage, run_pipeline
 from .report_writer import write_report
-from doc_processor import scrape_lh_detail, scrape_ih_detail, create_scrape_client
+from doc_processor import scrape_lh_detail, scrape_ih_detail, scrape_stats, shutdown_parse_executor
+from http_utils import reset_retry_budget, aclose_shared_clients
+from rate_limit import limiter_stats
+from supply_store import NUMPY_AVAILABLE, SupplyStore
+from .history_export import export_run
 
 # ---------------------------------------------------------------------------
 # 로깅 설정 (콘솔 + 파일 동시 출력)
@@ -33,8 +39,6 @@ logger = logging.getLogger(__name__)
 IH_LOOKBACK_DAYS = 90
 
 _NOISE_KEYWORDS = ("마감", "취소", "결과", "계약", "입주안내", "변경", "정정")
-_SCRAPE_DELAY = 0.3  # 정부 사이트 rate limit (Semaphore(3) × 0.3초 ≈ 3.3 req/s)
-_SCRAPE_CONCURRENCY = 3  # 스크래핑 동시 요청 수 (LH/IH 각각)
 
 
 def _is_recruitment_notice(notice: dict) -> bool:
@@ -53,52 +57,75 @@ def _is_recruitment_notice(notice: dict) -> bool:
     )
 
 
-async def _scrape_pdf_urls(notices: list[dict], source: str) -> None:
-    """공고 목록의 상세 페이지를 스크래핑하여 PDF URL을 notice dict에 추가.
+async def _scrape_pdf_urls(notice: dict, source: str) -> None:
+    """공고 1건의 상세 페이지를 스크래핑하여 PDF URL을 notice dict에 추가.
 
     best-effort: 스크래핑 실패 시 빈 리스트 설정, 배치 진행에 영향 없음.
-    Semaphore로 동시 요청 수를 제한하여 정부 사이트 rate limit 준수.
+    동시 요청 수는 doc_processor의 사이트별 AdaptiveLimiter가 응답 상태에 맞춰 조절.
+    """
+    url = notice.get("DTL_URL", "") if source == "lh" else notice.get("link", "")
+    if not url:
+        notice["_pdf_urls"] = []
+        return
+    try:
+        scraper = scrape_lh_detail if source == "lh" else scrape_ih_detail
+        detail = await scraper(url)
+        notice["_pdf_urls"] = detail.get("files", [])
+    except Exception as e:
+        logger.warning(f"첨부파일 스크래핑 실패 ({source}): {e}")
+        notice["_pdf_urls"] = []
+
+
+async def _process_notices(source: str, notices: list[dict], sinks: list[NoticeSink]) -> dict:
+    """공고를 파이프라인(LH 공급정보 → 첨부파일 스크래핑 → 저장)으로 처리하고 저장 결과를 반환.
+
+    각 공고는 앞 단계가 끝나는 즉시 다음 단계로 넘어가며,
+    저장소 준비(Notion 페이지 캐시 동기화)도 앞 단계와 동시에 진행합니다.
+    마감 처리는 모든 공고가 저장된 뒤 finish()에서 한 번에 합니다.
     """
-    sem = asyncio.Semaphore(_SCRAPE_CONCURRENCY)
-
-    async def _scrape_one(notice, client):
-        url = notice.get("DTL_URL", "") if source == "lh" else notice.get("link", "")
-        if not url:
-            notice["_pdf_urls"] = []
-            return
-        async with sem:
-            try:
-                scraper = scrape_lh_detail if source == "lh" else scrape_ih_detail
-                detail = await scraper(url, client)
-                notice["_pdf_urls"] = detail.get("files", [])
-                await asyncio.sleep(_SCRAPE_DELAY)
-            except Exception as e:
-                logger.warning(f"첨부파일 스크래핑 실패 ({source}): {e}")
-                notice["_pdf_urls"] = []
-
-    async with create_scrape_client() as client:
-        await asyncio.gather(*[_scrape_one(n, client) for n in notices])
+    session = StoreSession(sinks, source)
+    opening = asyncio.create_task(session.open())
+
+    async def _store(notice: dict) -> None:
+        await opening
+        await session.upsert(notice)
+
+    stages = [
+        Stage("첨부파일", lambda n: _scrape_pdf_urls(n, source), PIPELINE_SCRAPE_WORKERS),
+        Stage("저장", _store, PIPELINE_UPSERT_WORKERS),
+    ]
+    if source == "lh":
+        stages.insert(0, Stage("공급정보", enrich_supply_one, PIPELINE_SUPPLY_WORKERS))
+
+    try:
+        await run_pipeline(source.upper(), notices, stages)
+        await opening
+    finally:
+        opening.cancel()
 
     scraped = sum(1 for n in notices if n.get("_pdf_urls"))
     logger.info(f"{source.upper()} 첨부파일 스크래핑: {scraped}/{len(notices)}건 성공")
+    return await session.finish(notices)
 
 
-async def run_lh_batch():
-    """LH 공고 배치: 매입임대 + 임대주택 → Notion DB upsert
+async def run_lh_batch(sinks: list[NoticeSink]):
+    """LH 공고 배치: 매입임대 + 임대주택 → 공고 저장소(sinks) upsert
 
     Returns:
-        tuple[bool, dict | None]: (성공여부, upsert 결과)
+        tuple[bool, dict | None]: (성공여부, upsert 결과 + notices: 처리한 공고 목록)
     """
     logger.info("-" * 40)
     logger.info("LH 배치 시작")
 
     try:
-        # 인천 지역(CNP_CD=28) + 전국(CNP_CD 없음) 이중 조회 (공유 클라이언트)
-        async with httpx.AsyncClient(timeout=30.0) as api_client:
-            regional = [fetch_lh_notices(tp_code=tp, status="", cnp_code="28", client=api_client) for tp in LH_TP_CODES]
-            national = [fetch_lh_notices(tp_code=tp, status="", cnp_code="", client=api_client) for tp in LH_TP_CODES]
+        # 인천 지역(CNP_CD=28) + 전국(CNP_CD 없음) 이중 조회 (프로세스 공유 클라이언트)
+        # 목록만 먼저 조회 → 필터·중복 제거 후 남은 공고만 공급정보 조회 (지연 조회)
+        regional = [fetch_all_lh_notices(tp_code=tp, status="", cnp_code="28", with_supply=False)
+                    for tp in LH_TP_CODES]
+        national = [fetch_all_lh_notices(tp_code=tp, status="", cnp_code="", with_supply=False)
+                    for tp in LH_TP_CODES]
 
-            all_results = await asyncio.gather(*(regional + national), return_exceptions=True)
+        all_results = await asyncio.gather(*(regional + national), return_exceptions=True)
 
         regional_valid = []
         national_valid = []
@@ -130,6 +157,7 @@ async def run_lh_batch():
             )
 
         # 인천 우선 dedup + 도서지역 제외 (인천 직접 조회에도 도서지역 포함되므로)
+        # 필터를 통과한 공고만 파이프라인 첫 단계에서 공급정보 조회
         notices = exclude_subregions(
             dedup_by_pan_id(regional_notices, national_filtered),
             EXCLUDE_SUBREGIONS,
@@ -142,25 +170,31 @@ async def run_lh_batch():
 
     if not notices:
         logger.info("LH 해당 공고 없음.")
-        return True, {"new": 0, "updated": 0, "closed": 0, "failed": 0, "new_notices": [], "failed_notices": []}
-
-    await _scrape_pdf_urls(notices, "lh")
+        return True, {"new": 0, "updated": 0, "closed": 0, "failed": 0, "new_notices": [], "failed_notices": [],
+                      "notices": []}
 
     try:
-        result = await lh_upsert_all(notices)
+        result = await _process_notices("lh", notices, sinks)
     except Exception as e:
-        logger.error(f"LH Notion 저장 중 오류: {e}")
+        logger.error(f"LH 저장 중 오류: {e}")
         return False, None
 
+    if NUMPY_AVAILABLE:
+        try:
+            result["supply_summary"] = SupplyStore(notices).summarize("ais_type")
+        except Exception as e:
+            logger.warning(f"LH 공급가격 분포 집계 실패: {e}")
+    result["notices"] = notices
+
     logger.info("LH 배치 완료")
     return True, result
 
 
-async def run_ih_batch():
-    """IH 공고 배치: 최근 90일 입주자 모집 공고 → Notion DB upsert
+async def run_ih_batch(sinks: list[NoticeSink]):
+    """IH 공고 배치: 최근 90일 입주자 모집 공고 → 공고 저장소(sinks) upsert
 
     Returns:
-        tuple[bool, dict | None]: (성공여부, upsert 결과)
+        tuple[bool, dict | None]: (성공여부, upsert 결과 + notices: 처리한 공고 목록)
     """
     logger.info("-" * 40)
     logger.info("IH 배치 시작")
@@ -185,40 +219,68 @@ async def run_ih_batch():
     notices = [n for n in notices if _is_recruitment_notice(n)]
     logger.info(f"IH 조회 결과: {raw_count}건 → 모집공고 필터 후 {len(notices)}건")
 
-    await _scrape_pdf_urls(notices, "ih")
-
     try:
-        result = await ih_upsert_all(notices)
+        result = await _process_notices("ih", notices, sinks)
     except Exception as e:
-        logger.error(f"IH Notion 저장 중 오류: {e}")
+        logger.error(f"IH 저장 중 오류: {e}")
         return False, None
+    result["notices"] = notices
 
     logger.info("IH 배치 완료")
     return True, result
 
 
 async def main():
-    validate_env(["OPEN_API_KEY", "NOTION_TOKEN", "NOTION_PARENT_PAGE_ID"])
+    sinks = get_sinks(BATCH_SINKS)
+    use_notion = "notion" in BATCH_SINKS
+    validate_env(["OPEN_API_KEY"] + (["NOTION_TOKEN", "NOTION_PARENT_PAGE_ID"] if use_notion else []))
 
     logger.info("=" * 50)
     logger.info("인천 임대주택 공고 배치 시작 (LH + IH)")
     start_time = time.time()
+    reset_retry_budget()
 
     try:
         (lh_ok, lh_result), (ih_ok, ih_result) = await asyncio.gather(
-            run_lh_batch(), run_ih_batch()
+            run_lh_batch(sinks), run_ih_batch(sinks)
         )
     except Exception as e:
         logger.error(f"배치 실행 중 예상치 못한 오류: {e}")
         lh_ok, lh_result = False, None
         ih_ok, ih_result = False, None
+    finally:
+        await aclose_shared_clients()
+        await asyncio.to_thread(shutdown_parse_executor)
 
-    elapsed = time.time() - start_time
-
+    # 실행 결과 공고 전체를 컬럼형 이력으로 저장 (Notion 재조회 없이 추세 분석용)
     try:
-        await write_report(lh_result, ih_result, elapsed, lh_ok, ih_ok)
+        await asyncio.to_thread(
+            export_run,
+            (lh_result or {}).get("notices"),
+            (ih_result or {}).get("notices"),
+        )
     except Exception as e:
-        logger.error(f"배치 리포트 생성 실패: {e}")
+        logger.error(f"공고 이력 저장 실패: {e}")
+
+    elapsed = time.time() - start_time
+
+    for stats in limiter_stats():
+        logger.info(
+            f"동시성 [{stats['name']}] 최종 {stats['limit']} "
+            f"(성공 {stats['successes']}, 과부하 {stats['overloads']}, 변경 {len(stats['history']) - 1}회)"
+        )
+    scraped = scrape_stats()
+    logger.info(
+        f"상세 페이지: 파싱 {scraped['parsed']}건, 캐시 재사용 — 304 {scraped['not_modified']}건, "
+        f"본문 동일 {scraped['unchanged']}건"
+    )
+
+    # 실행 리포트는 Notion DB에 기록 — Notion sink를 쓰는 실행에서만 생성
+    if use_notion:
+        try:
+            await write_report(lh_result, ih_result, elapsed, lh_ok, ih_ok)
+        except Exception as e:
+            logger.error(f"배치 리포트 생성 실패: {e}")
 
     if not lh_ok or not ih_ok:
         failed = []
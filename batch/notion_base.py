@@ -1,11 +1,22 @@
 """Notion 공통 로직 — notion_writer.py, ih_notion_writer.py에서 공유"""
 import asyncio
+import contextvars
+import hashlib
+import heapq
+import itertools
+import json
 import os
 import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from dotenv import set_key
 from notion_client import AsyncClient
 from notion_client.errors import APIResponseError, APIErrorCode
-from config import NOTION_TOKEN, NOTION_PARENT_PAGE_ID
+from config import (
+    NOTION_TOKEN, NOTION_PARENT_PAGE_ID, NOTION_REQUESTS_PER_SECOND,
+    NOTION_MIRROR_FULL_RESCAN, NOTION_MIRROR_MAX_AGE_DAYS, NOTION_SCAN_PARTITIONS,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -14,12 +25,100 @@ ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.env'
 _RATE_LIMIT_RETRIES = 3
 _RATE_LIMIT_BASE_DELAY = 1.0
 
+# 스케줄러 우선순위 (작을수록 먼저)
+PRIORITY_HIGH = 0    # 배치 리포트
+PRIORITY_NORMAL = 1  # 조회·upsert
+PRIORITY_LOW = 2     # 마감 처리
+
+# 동시에 진행할 Notion 작업(공고 upsert/마감) 수 — 실제 요청 속도는 스케줄러가 제한
+NOTION_MAX_CONCURRENCY = 8
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("notion_priority", default=PRIORITY_NORMAL)
+
+
+@contextmanager
+def notion_priority(level: int):
+    """블록 안(및 여기서 생성한 task)의 Notion 요청 우선순위를 지정합니다."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class NotionScheduler:
+    """프로세스 전체 Notion 요청 스케줄러 — 토큰 버킷(초당 rate) + 우선순위 큐.
+
+    LH/IH writer와 report_writer의 모든 요청이 하나의 속도 예산을 공유하며,
+    토큰이 날 때마다 우선순위가 가장 높은(같으면 먼저 온) 요청을 내보냅니다.
+    rate_limited 응답 시 penalize()로 전체 요청을 잠시 멈춥니다.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._dispatcher: asyncio.Task | None = None
+
+    async def acquire(self, priority: int = PRIORITY_NORMAL) -> None:
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        await fut
+
+    def penalize(self, seconds: float) -> None:
+        """seconds 동안 새 요청을 내보내지 않습니다."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        # 대기 시간만큼 토큰이 쌓이지 않도록 해제 시점부터 다시 충전
+        self._tokens = 0.0
+        self._updated = self._blocked_until
+
+    async def _dispatch(self) -> None:
+        while self._waiters:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                await asyncio.sleep(self._blocked_until - now)
+                continue
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+            _, _, fut = heapq.heappop(self._waiters)
+            if fut.done():  # 대기 중 취소됨
+                continue
+            self._tokens -= 1
+            fut.set_result(None)
+
+
+NOTION_SCHEDULER = NotionScheduler(NOTION_REQUESTS_PER_SECOND)
+
+
+async def gather_limited(coros, limit: int = NOTION_MAX_CONCURRENCY) -> list:
+    """coroutine들을 최대 limit개씩 동시에 실행하고 입력 순서대로 결과를 반환합니다."""
+    sem = asyncio.Semaphore(limit)
+
+    async def _run(coro):
+        async with sem:
+            return await coro
+
+    return await asyncio.gather(*[_run(c) for c in coros])
+
 
 class _RetryAsyncClient(AsyncClient):
-    """rate_limited(429) 시 exponential backoff 자동 재시도하는 AsyncClient."""
+    """rate_limited(429) 시 exponential backoff 자동 재시도하는 AsyncClient.
+
+    모든 요청(재시도 포함)은 NOTION_SCHEDULER의 토큰을 받은 뒤 전송됩니다.
+    """
 
     async def request(self, *args, **kwargs):
         for attempt in range(_RATE_LIMIT_RETRIES + 1):
+            await NOTION_SCHEDULER.acquire(_priority.get())
             try:
                 return await super().request(*args, **kwargs)
             except APIResponseError as e:
@@ -29,7 +128,8 @@ class _RetryAsyncClient(AsyncClient):
                         f"Notion rate limited — {delay}초 후 재시도 "
                         f"({attempt + 1}/{_RATE_LIMIT_RETRIES})"
                     )
-                    await asyncio.sleep(delay)
+                    # 다른 요청도 함께 멈춤 (같은 integration 속도 제한 공유)
+                    NOTION_SCHEDULER.penalize(delay)
                 else:
                     raise
 
@@ -55,6 +155,24 @@ def select(value: str) -> dict:
     return {"select": {"name": value}} if value else {"select": None}
 
 
+# 의미 있는 속성 변경 감지용 해시 속성 (수집일시처럼 매번 바뀌는 속성은 제외)
+FINGERPRINT_PROPERTY = "_속성해시"
+_FINGERPRINT_EXCLUDED = {"수집일시", FINGERPRINT_PROPERTY}
+
+
+def property_fingerprint(properties: dict) -> str:
+    """페이지 속성 payload의 해시 (수집일시 제외) — 같으면 pages.update 생략."""
+    data = {k: v for k, v in properties.items() if k not in _FINGERPRINT_EXCLUDED}
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    return hashlib.md5(payload.encode()).hexdigest()[:16]
+
+
+def plain_text(prop: dict) -> str:
+    """rich_text 속성 값의 첫 텍스트 (없으면 빈 문자열)."""
+    items = (prop or {}).get("rich_text", [])
+    return items[0].get("plain_text", "") if items else ""
+
+
 async def query_db(db_id: str, body: dict) -> dict:
     """DB query (비동기)"""
     return await get_notion_client().request(
@@ -84,6 +202,132 @@ async def paginate_query(db_id: str, body_base: dict | None = None) -> list[dict
     return all_pages
 
 
+def _created_time_filter(start: datetime | None, end: datetime | None) -> dict:
+    """start 이상 end 미만 created_time 필터 (None이면 해당 방향 제한 없음)."""
+    conditions = []
+    if start is not None:
+        conditions.append({"timestamp": "created_time", "created_time": {"on_or_after": start.isoformat()}})
+    if end is not None:
+        conditions.append({"timestamp": "created_time", "created_time": {"before": end.isoformat()}})
+    return conditions[0] if len(conditions) == 1 else {"and": conditions}
+
+
+async def partitioned_scan(db_id: str, partitions: int = NOTION_SCAN_PARTITIONS, body_base: dict | None = None) -> list[dict]:
+    """DB 전체를 created_time 구간으로 나눠 구간별 커서를 동시에 진행하고 결과를 병합합니다.
+
+    가장 오래된 페이지의 created_time ~ 현재를 partitions개의 겹치지 않는 구간으로 나누며,
+    첫 구간은 시작 제한 없이, 마지막 구간은 끝 제한 없이 두어 전체를 빠짐없이 덮습니다.
+    요청 속도는 NOTION_SCHEDULER가 제한하며, 결과는 page id로 중복 제거합니다.
+    body_base의 filter가 있으면 각 구간 필터와 and로 결합합니다.
+    """
+    body_base = dict(body_base or {})
+    if partitions <= 1:
+        return await paginate_query(db_id, body_base or None)
+
+    oldest = await query_db(db_id, {
+        "page_size": 1,
+        "sorts": [{"timestamp": "created_time", "direction": "ascending"}],
+        **({"filter": body_base["filter"]} if "filter" in body_base else {}),
+    })
+    if not oldest.get("results"):
+        return []
+    start = datetime.fromisoformat(oldest["results"][0]["created_time"].replace("Z", "+00:00"))
+    step = (datetime.now(tz=timezone.utc) - start) / partitions
+    bounds = [None] + [start + step * i for i in range(1, partitions)] + [None]
+
+    base_filter = body_base.pop("filter", None)
+    bodies = []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        part = _created_time_filter(lo, hi)
+        bodies.append({**body_base, "filter": {"and": [base_filter, part]} if base_filter else part})
+
+    results = await asyncio.gather(*[paginate_query(db_id, body) for body in bodies])
+    pages: dict[str, dict] = {}
+    for part_pages in results:
+        for page in part_pages:
+            pages[page["id"]] = page
+    logger.info(f"Notion DB 분할 조회 — {partitions}구간, {len(pages)}페이지")
+    return list(pages.values())
+
+
+# ---------------------------------------------------------------------------
+# DB 로컬 미러 (페이지 캐시 증분 동기화)
+# ---------------------------------------------------------------------------
+MIRROR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".notion_mirror")
+_MIRROR_VERSION = 1
+# last_edited_time은 분 단위로 기록되고 서버·로컬 시계 차이가 있으므로 여유를 두고 조회
+_MIRROR_SAFETY_MARGIN = timedelta(minutes=5)
+
+
+def _mirror_path(db_id: str) -> str:
+    return os.path.join(MIRROR_DIR, f"{db_id}.json")
+
+
+def _load_mirror(db_id: str) -> dict | None:
+    try:
+        with open(_mirror_path(db_id), encoding="utf-8") as f:
+            mirror = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return mirror if mirror.get("version") == _MIRROR_VERSION else None
+
+
+def _save_mirror(db_id: str, mirror: dict) -> None:
+    os.makedirs(MIRROR_DIR, exist_ok=True)
+    path = _mirror_path(db_id)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(mirror, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+async def load_page_map(db_id: str, entry_fn, full: bool = False) -> dict[str, dict]:
+    """DB 페이지 캐시 {key: info}를 로컬 미러(batch/.notion_mirror/{db_id}.json)로 증분 동기화하여 반환.
+
+    entry_fn(page) -> (key, info) | None: 페이지에서 식별 key와 캐시 정보를 추출 (key 없으면 None)
+    평소에는 마지막 동기화 이후 last_edited_time이 바뀐 페이지만 조회합니다.
+    다음 경우에는 전체 조회합니다.
+    - full=True 또는 NOTION_MIRROR_FULL_RESCAN
+    - 미러가 없거나 형식이 바뀐 경우
+    - 마지막 전체 조회가 NOTION_MIRROR_MAX_AGE_DAYS일보다 오래된 경우
+    DB 쿼리는 보관(삭제)된 페이지를 반환하지 않으므로, 삭제 반영은 전체 조회 시에만 됩니다.
+    """
+    mirror = _load_mirror(db_id)
+    started = datetime.now(tz=timezone.utc)
+    if (
+        full or NOTION_MIRROR_FULL_RESCAN or mirror is None
+        or started - datetime.fromisoformat(mirror["full_synced_at"]) > timedelta(days=NOTION_MIRROR_MAX_AGE_DAYS)
+    ):
+        pages = await partitioned_scan(db_id)
+        entries: dict[str, dict] = {}
+        mirror = {"version": _MIRROR_VERSION, "full_synced_at": started.isoformat()}
+        logger.info(f"Notion DB 전체 조회 — {len(pages)}페이지 (미러 재구성)")
+    else:
+        since = datetime.fromisoformat(mirror["synced_at"]) - _MIRROR_SAFETY_MARGIN
+        pages = await paginate_query(db_id, {
+            "filter": {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": since.isoformat()}},
+        })
+        entries = mirror["pages"]
+        logger.info(f"Notion DB 증분 조회 — {since:%Y-%m-%d %H:%M} 이후 수정 {len(pages)}페이지")
+
+    for page in pages:
+        item = None if page.get("archived") or page.get("in_trash") else entry_fn(page)
+        if item is None:
+            entries.pop(page["id"], None)
+            continue
+        key, info = item
+        entries[page["id"]] = {"key": key, **info}
+
+    mirror["synced_at"] = started.isoformat()
+    mirror["pages"] = entries
+    try:
+        _save_mirror(db_id, mirror)
+    except OSError as e:
+        logger.warning(f"Notion 미러 저장 실패 (다음 실행은 전체 조회): {e}")
+
+    return {e["key"]: {k: v for k, v in e.items() if k != "key"} for e in entries.values()}
+
+
 _checked_dbs: set[str] = set()
 
 
@@ -4,7 +4,8 @@ import logging
 from datetime import datetime, timezone
 from .notion_base import (
     get_notion_client, rich_text, select, query_db, paginate_query,
-    get_or_create_database,
+    get_or_create_database, gather_limited, notion_priority, PRIORITY_LOW,
+    FINGERPRINT_PROPERTY, property_fingerprint, plain_text, load_page_map,
 )
 
 logger = logging.getLogger(__name__)
@@ -24,6 +25,8 @@ DB_PROPERTIES = {
     "수집일시":  {"date": {}},
     "첨부파일":  {"files": {}},
     "_블록해시": {"rich_text": {}},
+    "_블록ID":   {"rich_text": {}},
+    FINGERPRINT_PROPERTY: {"rich_text": {}},
 }
 
 
@@ -57,54 +60,67 @@ def _build_properties(notice: dict, collected_at: str) -> dict:
     }
 
 
-def _build_supply_blocks(supply_details: list[dict], supply_columns: dict = None) -> list[dict]:
-    """공급유형 상세를 Notion 테이블 블록으로 변환."""
-    blocks: list[dict] = [
-        {
-            "type": "heading_2",
-            "heading_2": {"rich_text": rich_text("공급 유형 상세")},
-        }
-    ]
+_SUPPLY_HEADING = "공급 유형 상세"
+_MAX_CHILDREN = 100  # Notion API: 요청당 children 최대 개수
+
+
+def _build_supply_section(supply_details: list[dict], supply_columns: dict = None) -> tuple[dict, list[dict]]:
+    """공급유형 상세를 토글 heading_2 컨테이너 블록(자식: 테이블)으로 변환.
 
+    컨테이너 하나만 삭제·추가하면 공급정보 섹션 전체가 교체되도록 묶습니다.
+
+    Returns:
+        tuple[dict, list[dict]]: (컨테이너 블록, children 100개 제한으로 나중에 테이블에 추가할 행)
+    """
+    overflow: list[dict] = []
     if not supply_details:
-        blocks.append({
+        children = [{
             "type": "paragraph",
             "paragraph": {"rich_text": rich_text("공급 유형 정보 없음")},
-        })
-        return blocks
-
-    def _cell(text: str) -> list:
-        return [{"type": "text", "text": {"content": str(text or "")}}]
-
-    if supply_columns:
-        fields = list(supply_columns.keys())
-        col_names = list(supply_columns.values())
+        }]
     else:
-        fields = list(supply_details[0].keys())
-        col_names = fields
+        def _cell(text: str) -> list:
+            return [{"type": "text", "text": {"content": str(text or "")}}]
 
-    header_row = {
-        "type": "table_row",
-        "table_row": {"cells": [_cell(name) for name in col_names]},
-    }
-    data_rows = [
-        {
+        if supply_columns:
+            fields = list(supply_columns.keys())
+            col_names = list(supply_columns.values())
+        else:
+            fields = list(supply_details[0].keys())
+            col_names = fields
+
+        header_row = {
             "type": "table_row",
-            "table_row": {"cells": [_cell(d.get(f, "")) for f in fields]},
+            "table_row": {"cells": [_cell(name) for name in col_names]},
         }
-        for d in supply_details
-    ]
-
-    blocks.append({
-        "type": "table",
-        "table": {
-            "table_width": len(fields),
-            "has_column_header": True,
-            "has_row_header": False,
-            "children": [header_row] + data_rows,
+        data_rows = [
+            {
+                "type": "table_row",
+                "table_row": {"cells": [_cell(d.get(f, "")) for f in fields]},
+            }
+            for d in supply_details
+        ]
+        rows = [header_row] + data_rows
+        overflow = rows[_MAX_CHILDREN:]
+        children = [{
+            "type": "table",
+            "table": {
+                "table_width": len(fields),
+                "has_column_header": True,
+                "has_row_header": False,
+                "children": rows[:_MAX_CHILDREN],
+            },
+        }]
+
+    container = {
+        "type": "heading_2",
+        "heading_2": {
+            "rich_text": rich_text(_SUPPLY_HEADING),
+            "is_toggleable": True,
+            "children": children,
         },
-    })
-    return blocks
+    }
+    return container, overflow
 
 
 def _compute_supply_hash(supply_details: list[dict], supply_columns: dict | None) -> str:
@@ -113,62 +129,122 @@ def _compute_supply_hash(supply_details: list[dict], supply_columns: dict | None
     return hashlib.md5(data.encode()).hexdigest()[:16]
 
 
-async def _replace_page_blocks(page_id: str, new_blocks: list[dict]):
-    """페이지의 기존 블록 전체 삭제 후 새 블록으로 교체 (페이지네이션 처리)"""
+async def _append_supply_section(page_id: str, container: dict, overflow: list[dict]) -> str:
+    """공급정보 컨테이너를 페이지 끝에 추가하고 컨테이너 블록 ID를 반환.
+
+    100행을 넘는 테이블은 컨테이너 → 테이블 순서로 추가하여 응답의 블록 ID로
+    나머지 행을 100개씩 이어 붙입니다 (블록 목록 조회 없음).
+    """
     notion = get_notion_client()
+    if not overflow:
+        response = await notion.blocks.children.append(block_id=page_id, children=[container])
+        return response["results"][0]["id"]
+
+    heading = {k: v for k, v in container["heading_2"].items() if k != "children"}
+    response = await notion.blocks.children.append(
+        block_id=page_id, children=[{"type": "heading_2", "heading_2": heading}],
+    )
+    container_id = response["results"][0]["id"]
+    response = await notion.blocks.children.append(
+        block_id=container_id, children=container["heading_2"]["children"],
+    )
+    table_id = response["results"][0]["id"]
+    for i in range(0, len(overflow), _MAX_CHILDREN):
+        await notion.blocks.children.append(block_id=table_id, children=overflow[i:i + _MAX_CHILDREN])
+    return container_id
+
+
+async def _remove_supply_section(page_id: str, container_id: str):
+    """기존 공급정보 섹션 삭제 (archive).
+
+    컨테이너 ID가 있으면 1회 호출로 삭제합니다. ID가 없는 페이지
+    (컨테이너를 함께 생성한 신규 페이지, 이전 형식의 heading+table 페이지)는
+    블록 목록을 조회해 컨테이너를, 없으면 최상위 블록 전체를 삭제합니다.
+    """
+    notion = get_notion_client()
+    if container_id:
+        try:
+            await notion.blocks.delete(block_id=container_id)
+            return
+        except Exception as e:
+            logger.warning(f"공급정보 컨테이너 삭제 실패 — 블록 목록으로 대체 (page_id={page_id}): {e}")
+
+    blocks = []
+    cursor = None
+    while True:
+        kw = {"start_cursor": cursor} if cursor else {}
+        existing = await notion.blocks.children.list(block_id=page_id, **kw)
+        blocks.extend(existing.get("results", []))
+        if not existing.get("has_more"):
+            break
+        cursor = existing.get("next_cursor")
+
+    containers = [
+        b for b in blocks
+        if b.get("type") == "heading_2" and b["heading_2"].get("is_toggleable")
+        and "".join(t.get("plain_text", "") for t in b["heading_2"].get("rich_text", [])) == _SUPPLY_HEADING
+    ]
+    await gather_limited(notion.blocks.delete(block_id=b["id"]) for b in (containers or blocks))
+
+
+async def _replace_supply_section(page_id: str, container_id: str, container: dict, overflow: list[dict]) -> str:
+    """공급정보 섹션 교체 — 기존 컨테이너 archive 1회 + 새 컨테이너 append 1회. 새 컨테이너 ID 반환."""
     try:
-        cursor = None
-        while True:
-            kw = {"start_cursor": cursor} if cursor else {}
-            existing = await notion.blocks.children.list(block_id=page_id, **kw)
-            for block in existing.get("results", []):
-                await notion.blocks.delete(block_id=block["id"])
-            if not existing.get("has_more"):
-                break
-            cursor = existing.get("next_cursor")
+        await _remove_supply_section(page_id, container_id)
     except Exception as e:
         logger.warning(f"기존 블록 삭제 실패 (page_id={page_id}): {e}")
-
-    if new_blocks:
-        await notion.blocks.children.append(block_id=page_id, children=new_blocks)
+    return await _append_supply_section(page_id, container, overflow)
 
 
 # ---------------------------------------------------------------------------
 # 페이지 캐시 빌드
 # ---------------------------------------------------------------------------
+def _page_entry(page: dict) -> tuple[str, dict] | None:
+    """페이지 → (PAN_ID, {"page_id", "status", "blocks_hash", "block_id", "prop_hash"}) (PAN_ID 없으면 None)."""
+    props = page.get("properties", {})
+    pan_id = plain_text(props.get("공고ID"))
+    if not pan_id:
+        return None
+    status = (props.get("공고상태", {}).get("select") or {}).get("name", "")
+    return pan_id, {
+        "page_id": page["id"],
+        "status": status,
+        "blocks_hash": plain_text(props.get("_블록해시")),
+        "block_id": plain_text(props.get("_블록ID")),
+        "prop_hash": plain_text(props.get(FINGERPRINT_PROPERTY)),
+    }
+
+
 async def _get_all_pan_id_page_map(db_id: str) -> dict[str, dict]:
-    """Notion DB의 모든 페이지를 {PAN_ID: {"page_id": ..., "status": ..., "blocks_hash": ...}} 형태로 반환."""
-    pages = {}
-    for page in await paginate_query(db_id):
-        props = page.get("properties", {})
-        pan_id_list = props.get("공고ID", {}).get("rich_text", [])
-        pan_id = pan_id_list[0].get("plain_text", "") if pan_id_list else ""
-        if pan_id:
-            status = (props.get("공고상태", {}).get("select") or {}).get("name", "")
-            hash_list = props.get("_블록해시", {}).get("rich_text", [])
-            blocks_hash = hash_list[0].get("plain_text", "") if hash_list else ""
-            pages[pan_id] = {
-                "page_id": page["id"],
-                "status": status,
-                "blocks_hash": blocks_hash,
-            }
-    return pages
+    """Notion DB의 모든 페이지를 {PAN_ID: {"page_id", "status", "blocks_hash", "block_id", "prop_hash"}} 형태로 반환.
+
+    로컬 미러를 증분 동기화하여 마지막 실행 이후 수정된 페이지만 조회합니다.
+    """
+    return await load_page_map(db_id, _page_entry)
 
 
 # ---------------------------------------------------------------------------
 # Upsert
 # ---------------------------------------------------------------------------
-async def upsert_notice(db_id: str, notice: dict, page_cache: dict[str, dict] | None = None):
-    """공고 1건을 Notion DB에 upsert합니다."""
+async def upsert_notice(db_id: str, notice: dict, page_cache: dict[str, dict] | None = None) -> str:
+    """공고 1건을 Notion DB에 upsert합니다.
+
+    속성 해시(_속성해시, 수집일시 제외)와 공급정보 해시(_블록해시)가 page_cache와 같으면
+    API 호출 없이 건너뜁니다.
+
+    Returns:
+        str: "new" | "updated" | "unchanged"
+    """
     notion = get_notion_client()
     collected_at = datetime.now(tz=timezone.utc).isoformat()
     properties = _build_properties(notice, collected_at)
+    prop_hash = property_fingerprint(properties)
 
     supply_details = notice.get("supply_details", [])
     supply_columns = notice.get("supply_columns")
-    supply_blocks = _build_supply_blocks(supply_details, supply_columns)
     new_hash = _compute_supply_hash(supply_details, supply_columns)
     properties["_블록해시"] = {"rich_text": rich_text(new_hash)}
+    properties[FINGERPRINT_PROPERTY] = {"rich_text": rich_text(prop_hash)}
 
     pan_id = notice["PAN_ID"]
     if page_cache is not None:
@@ -183,20 +259,45 @@ async def upsert_notice(db_id: str, notice: dict, page_cache: dict[str, dict] |
         cached = None
 
     if existing_page_id:
+        cached = cached or {}
+        blocks_changed = new_hash != cached.get("blocks_hash", "")
+        if not blocks_changed and prop_hash == cached.get("prop_hash", ""):
+            logger.debug(f"  [변경없음] {notice['PAN_NM']} (PAN_ID={pan_id})")
+            return "unchanged"
+        if blocks_changed:
+            # 블록 교체 후 속성 갱신 — 교체 실패 시 해시가 저장되지 않아 다음 실행에서 재시도
+            container, overflow = _build_supply_section(supply_details, supply_columns)
+            block_id = await _replace_supply_section(
+                existing_page_id, cached.get("block_id", ""), container, overflow,
+            )
+            properties["_블록ID"] = {"rich_text": rich_text(block_id)}
         await notion.pages.update(page_id=existing_page_id, properties=properties)
-        cached_hash = (cached or {}).get("blocks_hash", "")
-        if new_hash != cached_hash:
-            await _replace_page_blocks(existing_page_id, supply_blocks)
         logger.info(f"  [업데이트] {notice['PAN_NM']} (PAN_ID={pan_id})")
-        return False
+        return "updated"
     else:
-        await notion.pages.create(
-            parent={"type": "database_id", "database_id": db_id},
-            properties=properties,
-            children=supply_blocks,
-        )
+        container, overflow = _build_supply_section(supply_details, supply_columns)
+        if not overflow:
+            # 컨테이너를 함께 생성 (1회 호출) — _블록ID는 비워 두고 첫 교체 시 블록 목록으로 찾아 저장
+            await notion.pages.create(
+                parent={"type": "database_id", "database_id": db_id},
+                properties=properties,
+                children=[container],
+            )
+        else:
+            # 100행 초과 테이블은 나눠 추가한 뒤 블록 해시와 컨테이너 ID를 저장
+            # (추가 중 실패하면 블록 해시가 비어 있어 다음 실행에서 섹션을 다시 만듦)
+            blocks_hash = properties.pop("_블록해시")
+            page = await notion.pages.create(
+                parent={"type": "database_id", "database_id": db_id},
+                properties=properties,
+            )
+            block_id = await _append_supply_section(page["id"], container, overflow)
+            await notion.pages.update(
+                page_id=page["id"],
+                properties={"_블록해시": blocks_hash, "_블록ID": {"rich_text": rich_text(block_id)}},
+            )
         logger.info(f"  [신규등록] {notice['PAN_NM']} (PAN_ID={pan_id})")
-        return True
+        return "new"
 
 
 async def close_expired_notices(db_id: str, current_pan_ids: set[str], page_cache: dict[str, dict] | None = None):
@@ -229,64 +330,90 @@ async def close_expired_notices(db_id: str, current_pan_ids: set[str], page_cach
     if not expired:
         return 0
 
-    closed = 0
     logger.info(f"마감 처리 대상: {len(expired)}건")
-    for pan_id, page_id in expired.items():
+
+    async def _close(pan_id: str, page_id: str) -> bool:
         try:
             await notion.pages.update(
                 page_id=page_id,
-                properties={"공고상태": select("공고마감")},
+                # 속성 해시를 비워 공고가 다시 나타나면 반드시 갱신되도록 함
+                properties={"공고상태": select("공고마감"), FINGERPRINT_PROPERTY: {"rich_text": []}},
             )
             logger.info(f"  [공고마감] PAN_ID={pan_id}")
-            closed += 1
+            return True
         except Exception as e:
             logger.error(f"  [오류] 마감 처리 실패 (PAN_ID={pan_id}): {e}")
-    return closed
+            return False
 
+    with notion_priority(PRIORITY_LOW):
+        results = await gather_limited(_close(pan_id, page_id) for pan_id, page_id in expired.items())
+    return sum(results)
 
-async def upsert_all(notices: list[dict]) -> dict:
-    """공고 목록 전체를 Notion DB에 upsert하고, 마감된 공고는 상태 업데이트.
 
-    Returns:
-        dict: {"new": int, "updated": int, "closed": int, "failed": int, "new_notices": list}
+class UpsertSession:
+    """공고를 1건씩 upsert하고 마지막에 마감 처리하는 저장 세션.
+
+    open() → upsert(notice) 반복(동시 호출 가능) → finish(notices) 순서로 사용하며,
+    배치 파이프라인이 공고를 준비되는 대로 흘려보낼 때 씁니다.
     """
-    db_id = await get_or_create_database("NOTION_DATABASE_ID", DB_NAME, DB_PROPERTIES)
-    current_pan_ids = {n["PAN_ID"] for n in notices}
 
-    logger.info("Notion DB 전체 조회 중...")
-    page_cache = await _get_all_pan_id_page_map(db_id)
-    logger.info(f"기존 등록 공고 수: {len(page_cache)}건")
+    def __init__(self):
+        self.db_id = ""
+        self.page_cache: dict[str, dict] = {}
+        self.counts = {"new": 0, "updated": 0, "unchanged": 0}
+        self.new_notices: list[dict] = []
+        self.failed_notices: list[dict] = []
 
-    new, updated, failed = 0, 0, 0
-    new_notices: list[dict] = []
-    failed_notices: list[dict] = []
+    async def open(self) -> None:
+        self.db_id = await get_or_create_database("NOTION_DATABASE_ID", DB_NAME, DB_PROPERTIES)
+        logger.info("Notion DB 페이지 캐시 동기화 중...")
+        self.page_cache = await _get_all_pan_id_page_map(self.db_id)
+        logger.info(f"기존 등록 공고 수: {len(self.page_cache)}건")
 
-    for notice in notices:
+    async def upsert(self, notice: dict) -> None:
         try:
-            is_new = await upsert_notice(db_id, notice, page_cache=page_cache)
-            if is_new:
-                new += 1
-                new_notices.append(notice)
-            else:
-                updated += 1
+            outcome = await upsert_notice(self.db_id, notice, page_cache=self.page_cache)
         except Exception as e:
             logger.error(f"  [오류] {notice.get('PAN_NM', '?')} (PAN_ID={notice.get('PAN_ID', '?')}): {e}")
-            failed += 1
-            failed_notices.append({
+            self.failed_notices.append({
                 "PAN_ID": notice.get("PAN_ID", ""),
                 "PAN_NM": notice.get("PAN_NM", ""),
                 "error": str(e),
             })
+            return
+        self.counts[outcome] += 1
+        if outcome == "new":
+            self.new_notices.append(notice)
+
+    async def finish(self, notices: list[dict]) -> dict:
+        """notices(이번 실행의 전체 공고)에 없는 활성 공고를 마감 처리하고 결과를 반환."""
+        supply_errors = sum(1 for n in notices if n.get("supply_error"))
+        if supply_errors:
+            logger.warning(f"공급정보 조회 실패: {supply_errors}건")
+
+        current_pan_ids = {n["PAN_ID"] for n in notices}
+        closed = await close_expired_notices(self.db_id, current_pan_ids, page_cache=self.page_cache)
+
+        failed = len(self.failed_notices)
+        logger.info(
+            f"Notion 저장 완료 - 신규: {self.counts['new']}, 업데이트: {self.counts['updated']}, "
+            f"변경없음: {self.counts['unchanged']}, 마감: {closed}, 실패: {failed}"
+        )
+        return {
+            **self.counts, "closed": closed, "failed": failed,
+            "supply_errors": supply_errors,
+            "new_notices": self.new_notices, "failed_notices": self.failed_notices,
+        }
 
-    supply_errors = sum(1 for n in notices if n.get("supply_error"))
-    if supply_errors:
-        logger.warning(f"공급정보 조회 실패: {supply_errors}건")
 
-    closed = await close_expired_notices(db_id, current_pan_ids, page_cache=page_cache)
+async def upsert_all(notices: list[dict]) -> dict:
+    """공고 목록 전체를 Notion DB에 upsert하고, 마감된 공고는 상태 업데이트.
 
-    logger.info(f"Notion 저장 완료 - 신규: {new}, 업데이트: {updated}, 마감: {closed}, 실패: {failed}")
-    return {
-        "new": new, "updated": updated, "closed": closed, "failed": failed,
-        "supply_errors": supply_errors,
-        "new_notices": new_notices, "failed_notices": failed_notices,
-    }
+    Returns:
+        dict: {"new": int, "updated": int, "unchanged": int, "closed": int, "failed": int, "new_notices": list}
+    """
+    session = UpsertSession()
+    await session.open()
+    # 공고별 upsert를 동시에 진행 (요청 속도는 Notion 스케줄러가 제한)
+    await gather_limited(session.upsert(n) for n in notices)
+    return await session.finish(notices)
@@ -0,0 +1,75 @@
+"""배치 단계별 스트리밍 파이프라인.
+
+공고를 단계(공급정보 → 첨부파일 스크래핑 → 저장) 순서로 흘려보내며,
+각 공고는 앞 단계가 끝나는 즉시 다음 단계로 넘어갑니다.
+- 단계마다 작업자 수만큼 동시에 처리
+- 단계 사이 큐 크기가 제한되어 있어 뒤 단계가 느리면 앞 단계가 대기 (backpressure)
+- 전체 소요 시간은 단계 합이 아니라 가장 느린 단계에 수렴
+단계 함수는 실패를 스스로 처리해야 하며, 예외가 올라오면 나머지 작업을 취소하고 다시 올립니다.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable
+
+from config import PIPELINE_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """파이프라인 단계: 이름, 공고 1건 처리 함수, 작업자 수."""
+    name: str
+    fn: Callable[[dict], Awaitable[None]]
+    workers: int
+
+    def __post_init__(self):
+        # 작업자가 없으면 큐를 읽는 쪽이 없어 앞 단계가 put()에서 영원히 대기
+        if self.workers < 1:
+            raise ValueError(f"파이프라인 단계 '{self.name}' 작업자 수는 1 이상이어야 합니다: {self.workers}")
+
+
+async def run_pipeline(
+    label: str, items: Iterable[dict], stages: list[Stage], queue_size: int = PIPELINE_QUEUE_SIZE,
+) -> None:
+    """items를 stages 순서로 처리합니다. 모든 항목이 마지막 단계를 통과하면 반환."""
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in stages]
+    started = time.monotonic()
+    counts = [0] * len(stages)
+
+    async def _feed():
+        for item in items:
+            await queues[0].put(item)
+        for _ in range(stages[0].workers):
+            await queues[0].put(_DONE)
+
+    async def _worker(i: int):
+        stage = stages[i]
+        next_queue = queues[i + 1] if i + 1 < len(stages) else None
+        while True:
+            item = await queues[i].get()
+            if item is _DONE:
+                return
+            await stage.fn(item)
+            counts[i] += 1
+            if next_queue is not None:
+                await next_queue.put(item)
+
+    async def _run_stage(i: int):
+        await asyncio.gather(*[_worker(i) for _ in range(stages[i].workers)])
+        logger.info(f"{label} [{stages[i].name}] 완료: {counts[i]}건 ({time.monotonic() - started:.1f}초)")
+        if i + 1 < len(stages):
+            for _ in range(stages[i + 1].workers):
+                await queues[i + 1].put(_DONE)
+
+    tasks = [asyncio.create_task(_feed())] + [asyncio.create_task(_run_stage(i)) for i in range(len(stages))]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
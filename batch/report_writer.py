@@ -1,7 +1,10 @@
 """배치 실행 리포트를 Notion DB에 생성합니다."""
 import logging
 from datetime import datetime, timezone
-from .notion_base import get_notion_client, rich_text, select, get_or_create_database
+from .notion_base import (
+    get_notion_client, rich_text, select, get_or_create_database, notion_priority, PRIORITY_HIGH,
+)
+from supply_store import format_supply_group
 
 logger = logging.getLogger(__name__)
 
@@ -12,9 +15,11 @@ DB_PROPERTIES = {
     "소요시간":     {"rich_text": {}},
     "LH신규":       {"number": {}},
     "LH업데이트":   {"number": {}},
+    "LH변경없음":   {"number": {}},
     "LH마감":       {"number": {}},
     "IH신규":       {"number": {}},
     "IH업데이트":   {"number": {}},
+    "IH변경없음":   {"number": {}},
     "IH마감":       {"number": {}},
     "LH실패":       {"number": {}},
     "LH공급실패":   {"number": {}},
@@ -32,6 +37,7 @@ def _determine_status(lh_ok: bool, ih_ok: bool) -> str:
 
 
 _MAX_DETAIL_ITEMS = 20  # Notion API 100-block 제한 방어 (heading 포함 여유 확보)
+_MAX_BLOCKS = 100  # pages.create children 최대 블록 수
 
 
 def _append_section(blocks: list[dict], heading: str, items: list, format_fn) -> None:
@@ -78,6 +84,15 @@ def _build_detail_blocks(lh_result: dict | None, ih_result: dict | None) -> list
             "paragraph": {"rich_text": rich_text("신규 공고 없음")},
         })
 
+    _append_section(blocks, "LH 공급가격 분포 (유형별)", lh.get("supply_summary", []), format_supply_group)
+
+    if len(blocks) > _MAX_BLOCKS:
+        blocks = blocks[:_MAX_BLOCKS - 1]
+        blocks.append({
+            "type": "paragraph",
+            "paragraph": {"rich_text": rich_text("... 블록 수 제한으로 이후 내용 생략")},
+        })
+
     return blocks
 
 
@@ -88,7 +103,18 @@ async def write_report(
     lh_ok: bool,
     ih_ok: bool,
 ):
-    """배치 실행 리포트 1건을 Notion DB에 생성합니다."""
+    """배치 실행 리포트 1건을 Notion DB에 생성합니다 (Notion 스케줄러 최우선 순위)."""
+    with notion_priority(PRIORITY_HIGH):
+        await _write_report(lh_result, ih_result, elapsed_seconds, lh_ok, ih_ok)
+
+
+async def _write_report(
+    lh_result: dict | None,
+    ih_result: dict | None,
+    elapsed_seconds: float,
+    lh_ok: bool,
+    ih_ok: bool,
+):
     db_id = await get_or_create_database(
         "REPORT_DATABASE_ID", DB_NAME, DB_PROPERTIES, title_name="리포트명",
     )
@@ -107,9 +133,11 @@ async def write_report(
         "소요시간":   {"rich_text": rich_text(elapsed_str)},
         "LH신규":     {"number": lh.get("new", 0)},
         "LH업데이트": {"number": lh.get("updated", 0)},
+        "LH변경없음": {"number": lh.get("unchanged", 0)},
         "LH마감":     {"number": lh.get("closed", 0)},
         "IH신규":     {"number": ih.get("new", 0)},
         "IH업데이트": {"number": ih.get("updated", 0)},
+        "IH변경없음": {"number": ih.get("unchanged", 0)},
         "IH마감":     {"number": ih.get("closed", 0)},
         "LH실패":     {"number": lh.get("failed", 0)},
         "LH공급실패": {"number": lh.get("supply_errors", 0)},
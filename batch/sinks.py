@@ -0,0 +1,313 @@
+"""배치 공고 저장소(sink) — Notion DB / 로컬 SQLite.
+
+모든 sink는 upsert(source, notices)로 같은 의미를 제공합니다.
+- source: "lh" (PAN_ID 기준) / "ih" (정규화된 link 기준)
+- 현재 목록에 없는 활성 공고는 마감 처리 (LH 공고중→공고마감, IH 모집중→마감)
+- Zero-result guard: 조회 결과 0건이면 마감 처리 건너뜀
+- 반환: {"new", "updated", "closed", "failed", "new_notices", "failed_notices"} (+ LH "supply_errors")
+BATCH_SINKS로 실행마다 선택하며, 여러 개면 store()가 동시에 저장하고 첫 sink 결과를 리포트에 사용합니다.
+배치 파이프라인은 StoreSession으로 공고를 1건씩 흘려보내고 마지막에 finish()로 마감 처리합니다.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+from config import SQLITE_SINK_PATH
+from ih_api import normalize_link
+from .notion_base import gather_limited
+from .notion_writer import upsert_all as lh_notion_upsert_all, UpsertSession as LHNotionSession
+from .ih_notion_writer import upsert_all as ih_notion_upsert_all, UpsertSession as IHNotionSession
+
+logger = logging.getLogger(__name__)
+
+
+class SinkSession:
+    """sink 1개의 source별 저장 세션: open() → upsert(notice) 반복 → finish(notices).
+
+    기본 구현은 공고별 저장 없이 finish()에서 전체 목록을 sink.upsert()로 한 번에 저장합니다.
+    """
+
+    def __init__(self, sink: "NoticeSink", source: str):
+        self.sink = sink
+        self.source = source
+
+    async def open(self) -> None:
+        pass
+
+    async def upsert(self, notice: dict) -> None:
+        pass
+
+    async def finish(self, notices: list[dict]) -> dict:
+        return await self.sink.upsert(self.source, notices)
+
+
+class NoticeSink:
+    """공고 저장소 인터페이스."""
+
+    name = ""
+
+    async def upsert(self, source: str, notices: list[dict]) -> dict:
+        raise NotImplementedError
+
+    def session(self, source: str) -> SinkSession:
+        return SinkSession(self, source)
+
+
+class _NotionSession(SinkSession):
+    """Notion writer의 UpsertSession에 위임 — 공고가 준비되는 대로 1건씩 저장."""
+
+    def __init__(self, sink: "NoticeSink", source: str):
+        super().__init__(sink, source)
+        self._session = LHNotionSession() if source == "lh" else IHNotionSession()
+
+    async def open(self) -> None:
+        await self._session.open()
+
+    async def upsert(self, notice: dict) -> None:
+        await self._session.upsert(notice)
+
+    async def finish(self, notices: list[dict]) -> dict:
+        return await self._session.finish(notices)
+
+
+class NotionSink(NoticeSink):
+    """기존 Notion writer(notion_writer / ih_notion_writer)에 위임."""
+
+    name = "notion"
+
+    async def upsert(self, source: str, notices: list[dict]) -> dict:
+        upsert_all = lh_notion_upsert_all if source == "lh" else ih_notion_upsert_all
+        return await upsert_all(notices)
+
+    def session(self, source: str) -> SinkSession:
+        return _NotionSession(self, source)
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lh_notices (
+    pan_id TEXT PRIMARY KEY,
+    pan_nm TEXT,
+    ais_tp_cd_nm TEXT,
+    cnp_cd_nm TEXT,
+    pan_ss TEXT,
+    start_dt TEXT,
+    end_dt TEXT,
+    dtl_url TEXT,
+    supply_columns TEXT,
+    supply_details TEXT,
+    pdf_urls TEXT,
+    data TEXT,
+    collected_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_lh_notices_pan_ss ON lh_notices (pan_ss);
+CREATE TABLE IF NOT EXISTS ih_notices (
+    link TEXT PRIMARY KEY,
+    sj TEXT,
+    se_nm TEXT,
+    ty_nm TEXT,
+    crt_ymd TEXT,
+    status TEXT,
+    pdf_urls TEXT,
+    data TEXT,
+    collected_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_ih_notices_status ON ih_notices (status);
+"""
+
+_LH_UPSERT = """
+INSERT INTO lh_notices (pan_id, pan_nm, ais_tp_cd_nm, cnp_cd_nm, pan_ss, start_dt, end_dt, dtl_url,
+                        supply_columns, supply_details, pdf_urls, data, collected_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (pan_id) DO UPDATE SET
+    pan_nm = excluded.pan_nm, ais_tp_cd_nm = excluded.ais_tp_cd_nm, cnp_cd_nm = excluded.cnp_cd_nm,
+    pan_ss = excluded.pan_ss, start_dt = excluded.start_dt, end_dt = excluded.end_dt,
+    dtl_url = excluded.dtl_url, supply_columns = excluded.supply_columns,
+    supply_details = excluded.supply_details, pdf_urls = excluded.pdf_urls,
+    data = excluded.data, collected_at = excluded.collected_at
+"""
+
+_IH_UPSERT = """
+INSERT INTO ih_notices (link, sj, se_nm, ty_nm, crt_ymd, status, pdf_urls, data, collected_at)
+VALUES (?, ?, ?, ?, ?, '모집중', ?, ?, ?)
+ON CONFLICT (link) DO UPDATE SET
+    sj = excluded.sj, se_nm = excluded.se_nm, ty_nm = excluded.ty_nm, crt_ymd = excluded.crt_ymd,
+    status = '모집중', pdf_urls = excluded.pdf_urls, data = excluded.data, collected_at = excluded.collected_at
+"""
+
+# (테이블, 키 컬럼, 상태 컬럼, 활성 상태, 마감 상태) — Notion writer와 같은 상태값 사용
+_CLOSE_RULES = {
+    "lh": ("lh_notices", "pan_id", "pan_ss", "공고중", "공고마감"),
+    "ih": ("ih_notices", "link", "status", "모집중", "마감"),
+}
+
+
+def _json(value) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class SQLiteSink(NoticeSink):
+    """로컬 SQLite 저장소. 실행당 source별 1개 트랜잭션으로 일괄 upsert + 마감 처리."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = SQLITE_SINK_PATH):
+        self.path = path
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SQLITE_SCHEMA)
+        return conn
+
+    @staticmethod
+    def _lh_row(n: dict, collected_at: str) -> tuple:
+        data = {k: v for k, v in n.items() if k not in ("supply_columns", "supply_details", "_pdf_urls")}
+        return (
+            n["PAN_ID"], n.get("PAN_NM", ""), n.get("AIS_TP_CD_NM", ""), n.get("CNP_CD_NM", ""),
+            n.get("PAN_SS", ""), n.get("PAN_NT_ST_DT", ""), n.get("CLSG_DT", ""), n.get("DTL_URL", ""),
+            _json(n.get("supply_columns") or {}), _json(n.get("supply_details") or []),
+            _json(n.get("_pdf_urls") or []), _json(data), collected_at,
+        )
+
+    @staticmethod
+    def _ih_row(n: dict, link: str, collected_at: str) -> tuple:
+        data = {k: v for k, v in n.items() if k != "_pdf_urls"}
+        return (
+            link, n.get("sj", ""), n.get("seNm", ""), n.get("tyNm", ""), n.get("crtYmd", ""),
+            _json(n.get("_pdf_urls") or []), _json(data), collected_at,
+        )
+
+    def _upsert_sync(self, source: str, notices: list[dict]) -> dict:
+        table, key_col, status_col, active, closed_status = _CLOSE_RULES[source]
+        collected_at = datetime.now(tz=timezone.utc).isoformat()
+
+        rows, keys, new_notices, failed_notices = [], [], [], []
+        for n in notices:
+            try:
+                if source == "lh":
+                    key = n["PAN_ID"]
+                    rows.append(self._lh_row(n, collected_at))
+                else:
+                    key = normalize_link(n.get("link", ""))
+                    if not key:
+                        raise ValueError("link 없음")
+                    rows.append(self._ih_row(n, key, collected_at))
+                keys.append((key, n))
+            except Exception as e:
+                if source == "lh":
+                    failed = {"PAN_ID": n.get("PAN_ID", ""), "PAN_NM": n.get("PAN_NM", "")}
+                else:
+                    failed = {"sj": n.get("sj", ""), "link": n.get("link", "")}
+                failed["error"] = str(e)
+                failed_notices.append(failed)
+
+        conn = self._connect()
+        try:
+            with conn:
+                existing = {k for (k,) in conn.execute(f"SELECT {key_col} FROM {table}")}
+                conn.executemany(_LH_UPSERT if source == "lh" else _IH_UPSERT, rows)
+
+                current = {k for k, _ in keys}
+                active_keys = [
+                    k for (k,) in conn.execute(f"SELECT {key_col} FROM {table} WHERE {status_col} = ?", (active,))
+                ]
+                expired = [k for k in active_keys if k not in current]
+                if not current and active_keys:
+                    logger.warning(
+                        f"Zero-result guard: 조회 결과 0건, SQLite 활성 공고 {len(active_keys)}건 — 마감 처리 건너뜀"
+                    )
+                    expired = []
+                conn.executemany(
+                    f"UPDATE {table} SET {status_col} = ? WHERE {key_col} = ?",
+                    [(closed_status, k) for k in expired],
+                )
+        finally:
+            conn.close()
+
+        seen: set[str] = set()
+        for key, n in keys:
+            if key not in existing and key not in seen:
+                new_notices.append(n)
+            seen.add(key)
+        result = {
+            "new": len(new_notices),
+            "updated": len(seen) - len(new_notices),
+            "closed": len(expired),
+            "failed": len(failed_notices),
+            "new_notices": new_notices,
+            "failed_notices": failed_notices,
+        }
+        if source == "lh":
+            result["supply_errors"] = sum(1 for n in notices if n.get("supply_error"))
+        logger.info(
+            f"SQLite {source.upper()} 저장 완료 - 신규: {result['new']}, 업데이트: {result['updated']}, "
+            f"마감: {result['closed']}, 실패: {result['failed']}"
+        )
+        return result
+
+    async def upsert(self, source: str, notices: list[dict]) -> dict:
+        return await asyncio.to_thread(self._upsert_sync, source, notices)
+
+
+_SINK_TYPES = {sink.name: sink for sink in (NotionSink, SQLiteSink)}
+
+
+def get_sinks(names: list[str]) -> list[NoticeSink]:
+    """BATCH_SINKS 이름 목록 → sink 인스턴스 목록 (알 수 없는 이름이면 ValueError)."""
+    unknown = [n for n in names if n not in _SINK_TYPES]
+    if unknown or not names:
+        raise ValueError(f"알 수 없는 BATCH_SINKS: {', '.join(unknown) or '(비어 있음)'} "
+                         f"(사용 가능: {', '.join(_SINK_TYPES)})")
+    return [_SINK_TYPES[n]() for n in dict.fromkeys(names)]
+
+
+class StoreSession:
+    """여러 sink의 저장 세션을 묶어 공고를 모든 sink에 동시에 저장합니다.
+
+    첫 번째 sink가 실패하면 예외를 그대로 올리고 (배치 실패),
+    나머지 sink는 실패 시 이후 저장에서 제외하고 결과의 sink_errors에만 남깁니다.
+    """
+
+    def __init__(self, sinks: list[NoticeSink], source: str):
+        self.source = source
+        self._sessions = [sink.session(source) for sink in sinks]
+        self._sink_errors: dict[str, str] = {}
+
+    def _active(self) -> list[SinkSession]:
+        # 첫 번째 sink는 실패 시 예외를 올리므로 항상 목록의 맨 앞에 남음
+        return [s for s in self._sessions if s.sink.name not in self._sink_errors]
+
+    async def _call(self, method: str, *args) -> list:
+        sessions = self._active()
+        results = await asyncio.gather(*[getattr(s, method)(*args) for s in sessions], return_exceptions=True)
+        if isinstance(results[0], BaseException):
+            raise results[0]
+        for session, r in zip(sessions[1:], results[1:]):
+            if isinstance(r, BaseException):
+                logger.error(f"{session.sink.name} 저장 실패 ({self.source.upper()}): {r}")
+                self._sink_errors[session.sink.name] = str(r)
+        return results
+
+    async def open(self) -> None:
+        await self._call("open")
+
+    async def upsert(self, notice: dict) -> None:
+        await self._call("upsert", notice)
+
+    async def finish(self, notices: list[dict]) -> dict:
+        primary = (await self._call("finish", notices))[0]
+        if self._sink_errors:
+            primary["sink_errors"] = dict(self._sink_errors)
+        return primary
+
+
+async def store(sinks: list[NoticeSink], source: str, notices: list[dict]) -> dict:
+    """모든 sink에 동시에 저장하고 첫 번째 sink의 결과를 반환합니다 (실패 규칙은 StoreSession과 동일)."""
+    session = StoreSession(sinks, source)
+    await session.open()
+    await gather_limited(session.upsert(n) for n in notices)
+    return await session.finish(notices)
@@ -2,7 +2,9 @@
 import os
 from dotenv import load_dotenv
 
-load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env'))
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+load_dotenv(dotenv_path=os.path.join(BASE_DIR, '.env'))
 
 OPEN_API_KEY = os.getenv("OPEN_API_KEY")
 NOTION_TOKEN = os.getenv("NOTION_TOKEN")
@@ -20,6 +22,72 @@ NATIONWIDE_AIS_CODES = {"17"}
 # 도서지역 제외 키워드 (PAN_NM 매칭) — 지리적으로 먼 도서지역 공고 필터링
 EXCLUDE_SUBREGIONS = {"옹진", "강화"}
 
+# data.go.kr 응답 디스크 캐시 (RESPONSE_CACHE_PATH를 빈 문자열로 두면 비활성화)
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join(BASE_DIR, ".cache", "responses.sqlite3"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+
+# 상세 페이지 스크래핑 캐시 — URL별 ETag/Last-Modified·본문 해시·추출 결과 (빈 문자열이면 비활성화)
+SCRAPE_CACHE_PATH = os.getenv("SCRAPE_CACHE_PATH", os.path.join(BASE_DIR, ".cache", "scrape.sqlite3"))
+SCRAPE_CACHE_MAX_ENTRIES = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "5000"))
+LISTING_CACHE_TTL = int(os.getenv("LISTING_CACHE_TTL", "300"))   # 공고 목록 (초)
+SUPPLY_CACHE_TTL = int(os.getenv("SUPPLY_CACHE_TTL", "3600"))    # 공급정보 상세 (초)
+
+# MCP 서버 공고 스냅샷 (백그라운드 갱신 주기 — 0이면 스냅샷 없이 매 호출 실시간 조회)
+SNAPSHOT_REFRESH_SECONDS = int(os.getenv("SNAPSHOT_REFRESH_SECONDS", "600"))
+SNAPSHOT_LOOKBACK_DAYS = int(os.getenv("SNAPSHOT_LOOKBACK_DAYS", "365"))
+
+# Notion API 초당 요청 수 (integration 평균 허용치 3 rps — 배치 전체가 공유)
+NOTION_REQUESTS_PER_SECOND = float(os.getenv("NOTION_REQUESTS_PER_SECOND", "3"))
+
+# Notion DB 로컬 미러 — 평소에는 마지막 동기화 이후 수정된 페이지만 조회,
+# NOTION_MIRROR_FULL_RESCAN=1 이거나 마지막 전체 조회가 MAX_AGE_DAYS보다 오래되면 전체 재조회
+NOTION_MIRROR_FULL_RESCAN = os.getenv("NOTION_MIRROR_FULL_RESCAN", "").lower() in ("1", "true", "yes")
+NOTION_MIRROR_MAX_AGE_DAYS = int(os.getenv("NOTION_MIRROR_MAX_AGE_DAYS", "7"))
+# 전체 조회 시 created_time 구간 분할 수 (구간별 커서를 동시에 진행, 1이면 단일 커서)
+NOTION_SCAN_PARTITIONS = int(os.getenv("NOTION_SCAN_PARTITIONS", "4"))
+
+# 배치 공고 저장소 (쉼표로 여러 개 지정 시 모두에 저장, 첫 번째 결과로 리포트 작성)
+# notion: Notion DB, sqlite: 로컬 SQLite (SQLITE_SINK_PATH)
+BATCH_SINKS = [s.strip().lower() for s in os.getenv("BATCH_SINKS", "notion").split(",") if s.strip()]
+SQLITE_SINK_PATH = os.getenv("SQLITE_SINK_PATH", os.path.join(BASE_DIR, "data", "notices.sqlite3"))
+
+# 배치 파이프라인 (공급정보 → 첨부파일 스크래핑 → 저장) 단계별 작업자 수와 단계 간 큐 크기
+# 실제 동시 요청 수는 각 단계의 리미터(AdaptiveLimiter / Notion 스케줄러)가 조절하며, 작업자 수는 상한
+PIPELINE_SUPPLY_WORKERS = int(os.getenv("PIPELINE_SUPPLY_WORKERS", "20"))
+PIPELINE_SCRAPE_WORKERS = int(os.getenv("PIPELINE_SCRAPE_WORKERS", "10"))
+PIPELINE_UPSERT_WORKERS = int(os.getenv("PIPELINE_UPSERT_WORKERS", "8"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "16"))
+
+# 상세 페이지 HTML 파서 (auto: selectolax → lxml → beautifulsoup4 중 설치된 첫 번째)
+HTML_PARSER_BACKEND = os.getenv("HTML_PARSER_BACKEND", "auto").strip().lower()
+# 상세 페이지 파싱 실행기 (thread: 스레드 풀, process: 프로세스 풀 — 멀티코어 활용), 작업자 수 (0이면 기본값)
+SCRAPE_PARSE_EXECUTOR = os.getenv("SCRAPE_PARSE_EXECUTOR", "thread").strip().lower()
+SCRAPE_PARSE_WORKERS = int(os.getenv("SCRAPE_PARSE_WORKERS", "0"))
+
+# 배치 실행별 컬럼형(Arrow IPC) 공고 이력 저장 위치 (빈 문자열이면 비활성화, pyarrow 필요)
+HISTORY_EXPORT_DIR = os.getenv("HISTORY_EXPORT_DIR", os.path.join(BASE_DIR, "data", "history"))
+
+# 호스트별 요청 속도 제한 (초당 요청 수, 버스트) — 배치·MCP의 모든 HTTP 경로가 공유
+# 환경변수 HOST_RATE_LIMITS="host=rate:burst,..." 로 개별 호스트 값을 덮어쓸 수 있음
+DEFAULT_HOST_RATE_LIMIT: tuple[float, int] = (5.0, 5)
+
+
+def _parse_host_rate_limits(raw: str) -> dict[str, tuple[float, int]]:
+    limits = {}
+    for entry in filter(None, (e.strip() for e in raw.split(","))):
+        host, _, spec = entry.partition("=")
+        rate, _, burst = spec.partition(":")
+        limits[host.strip()] = (float(rate), int(burst) if burst else max(1, int(float(rate))))
+    return limits
+
+
+HOST_RATE_LIMITS: dict[str, tuple[float, int]] = {
+    "apis.data.go.kr": (10.0, 10),
+    "apply.lh.or.kr": (3.0, 3),
+    "www.ih.co.kr": (3.0, 3),
+    **_parse_host_rate_limits(os.getenv("HOST_RATE_LIMITS", "")),
+}
+
 
 def validate_env(required: list[str]) -> None:
     """필수 환경변수를 일괄 검증합니다. 누락 시 EnvironmentError를 raise합니다."""
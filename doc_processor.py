@@ -1,14 +1,44 @@
 """공고 상세 페이지 스크래핑 — 첨부파일 URL 추출.
 
 AI 호출 없음 — 순수 I/O 모듈.
+HTML 파싱은 설치된 백엔드 중 가장 빠른 것을 사용합니다 (selectolax → lxml → BeautifulSoup).
+전체 DOM 대신 <a href> 목록과 본문 컨테이너 텍스트만 뽑아 사이트별 추출기에 넘깁니다.
+파싱은 이벤트 루프 밖의 실행기(스레드 풀 / 프로세스 풀)에서 하며,
+경계를 넘는 데이터는 응답 원본 bytes와 결과 {files, html_text}뿐입니다.
+URL별 추출 결과를 캐시하여 조건부 요청(ETag/Last-Modified)이 304이거나
+본문 해시가 같으면 파싱 없이 이전 결과를 사용합니다.
 """
 
+import asyncio
+import hashlib
+import json
 import logging
+import os
 import re
-from urllib.parse import urljoin
+import sqlite3
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
 
 import httpx
 
+from config import (
+    HTML_PARSER_BACKEND, SCRAPE_PARSE_EXECUTOR, SCRAPE_PARSE_WORKERS, SCRAPE_CACHE_PATH, SCRAPE_CACHE_MAX_ENTRIES,
+)
+from http_utils import RETRY_STATUS_CODES, get_shared_client
+from rate_limit import AdaptiveLimiter, throttle
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
 try:
     from bs4 import BeautifulSoup
 except ImportError:
@@ -28,99 +58,376 @@ _DOC_EXTS = (".pdf", ".hwp", ".hwpx", ".xlsx", ".docx", ".zip")
 
 _LH_BASE = "https://apply.lh.or.kr"
 
+_LH_FILE_RE = re.compile(r"fileDownLoad\(['\"](\d+)['\"]\)")
+_IH_DOWNLOAD_RE = re.compile(r"(?:file|File)Down|download", re.I)
+# 본문 컨테이너: class 중 하나가 이 패턴에 맞는 첫 번째 <div>
+_CONTENT_CLASS_RE = re.compile(r"cont|detail|view|body", re.I)
+_SKIP_TEXT_TAGS = ("script", "style")
+
+# 사이트(host)별 스크래핑 동시 요청 수 — 초기 3에서 응답 상태에 따라 1~10 자동 조절 (AIMD)
+_SCRAPE_CONCURRENCY = 3
+_SCRAPE_MAX_CONCURRENCY = 10
+_SCRAPE_LIMITERS: dict[str, AdaptiveLimiter] = {}
 
-def create_scrape_client() -> httpx.AsyncClient:
-    """스크래핑용 httpx 클라이언트 생성 (배치에서 공유 클라이언트로 사용)."""
-    return httpx.AsyncClient(
+
+def get_scrape_client(url: str) -> httpx.AsyncClient:
+    """스크래핑용 프로세스 공유 httpx 클라이언트 (사이트별 연결 재사용)."""
+    return get_shared_client(
+        url, "scrape",
         timeout=_SCRAPE_TIMEOUT,
         headers={"User-Agent": _USER_AGENT},
         follow_redirects=True,
     )
 
 
+def _get_scrape_limiter(url: str) -> AdaptiveLimiter:
+    """URL host별 스크래핑 리미터 (최초 요청 시 생성)."""
+    host = urlparse(url).netloc
+    limiter = _SCRAPE_LIMITERS.get(host)
+    if limiter is None:
+        limiter = AdaptiveLimiter(
+            f"scrape:{host}", initial=_SCRAPE_CONCURRENCY, max_limit=_SCRAPE_MAX_CONCURRENCY,
+        )
+        _SCRAPE_LIMITERS[host] = limiter
+    return limiter
+
+
+def _is_overload_error(e: Exception) -> bool:
+    """사이트 과부하로 볼 수 있는 오류인지 (429/5xx/timeout)."""
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code in RETRY_STATUS_CODES
+    return isinstance(e, httpx.TimeoutException)
+
+
+# ---------------------------------------------------------------------------
+# HTML 파서 백엔드 — html → (anchors: [(href, text)], 본문 텍스트)
+# ---------------------------------------------------------------------------
+def _is_content_div(class_attr: str | None) -> bool:
+    return bool(class_attr) and any(_CONTENT_CLASS_RE.search(c) for c in class_attr.split())
+
+
+def _join_lines(strings) -> str:
+    """텍스트 노드별 strip 후 빈 줄 제외하고 줄바꿈으로 연결 (get_text(separator="\n", strip=True)와 동일)."""
+    return "\n".join(t for t in (s.strip() for s in strings) if t)
+
+
+def _parse_selectolax(html: str) -> tuple[list[tuple[str, str]], str]:
+    tree = HTMLParser(html)
+    anchors = [
+        (a.attributes.get("href") or "", a.text(deep=True, separator="", strip=True))
+        for a in tree.css("a[href]")
+    ]
+    tree.strip_tags(list(_SKIP_TEXT_TAGS))
+    container = next((d for d in tree.css("div[class]") if _is_content_div(d.attributes.get("class"))), None)
+    root = container or tree.root
+    # 텍스트 노드 단위로 모아야 노드 내부 줄바꿈이 bs4와 같게 유지됨
+    text = _join_lines(n.text_content for n in root.traverse(include_text=True) if n.tag == "-text") if root else ""
+    return anchors, text
+
+
+def _parse_lxml(html: str) -> tuple[list[tuple[str, str]], str]:
+    try:
+        doc = lxml.html.document_fromstring(html)
+    except ValueError:
+        # 인코딩 선언이 있는 XML 형식 문서는 str로 파싱 불가 → bytes로 재시도
+        doc = lxml.html.document_fromstring(html.encode("utf-8"))
+    anchors = [
+        (a.get("href"), "".join(s.strip() for s in a.itertext()))
+        for a in doc.iter("a") if a.get("href") is not None
+    ]
+    for el in doc.xpath("//script | //style | //comment()"):
+        el.drop_tree()
+    container = next((d for d in doc.iter("div") if _is_content_div(d.get("class"))), None)
+    return anchors, _join_lines((container if container is not None else doc).itertext())
+
+
+def _parse_bs4(html: str) -> tuple[list[tuple[str, str]], str]:
+    # 컨테이너가 없으면 문서 전체 텍스트를 쓰므로 전체 트리로 파싱
+    soup = BeautifulSoup(html, "html.parser")
+    anchors = [(a["href"], a.get_text(strip=True)) for a in soup.find_all("a", href=True)]
+    for el in soup.find_all(_SKIP_TEXT_TAGS):
+        el.decompose()
+    container = soup.find("div", class_=_CONTENT_CLASS_RE)
+    return anchors, (container or soup).get_text(separator="\n", strip=True)
+
+
+_PARSERS = {
+    name: fn for name, fn, available in (
+        ("selectolax", _parse_selectolax, HTMLParser is not None),
+        ("lxml", _parse_lxml, lxml is not None),
+        ("bs4", _parse_bs4, BeautifulSoup is not None),
+    ) if available
+}
+
+
+def _select_parser(preferred: str):
+    """HTML_PARSER_BACKEND(auto면 설치된 순서대로 첫 번째) → (이름, 파서). 설치된 백엔드가 없으면 (None, None)."""
+    if preferred != "auto" and preferred not in _PARSERS:
+        logger.warning(f"HTML 파서 '{preferred}' 사용 불가 — 자동 선택 (설치됨: {', '.join(_PARSERS) or '없음'})")
+        preferred = "auto"
+    name = next(iter(_PARSERS), None) if preferred == "auto" else preferred
+    return name, _PARSERS.get(name)
+
+
+PARSER_BACKEND, _parse_html = _select_parser(HTML_PARSER_BACKEND)
+
+
 # ---------------------------------------------------------------------------
-# 링크 추출 전략 (사이트별)
+# 링크 추출 전략 (사이트별) — anchors: [(href, 링크 텍스트)]
 # ---------------------------------------------------------------------------
-def _extract_lh_links(soup, base_url: str) -> list[dict]:
+def _absolute(href: str, base_url: str) -> str:
+    return urljoin(base_url, href) if not href.startswith("http") else href
+
+
+def _extract_lh_links(anchors: list[tuple[str, str]], base_url: str) -> list[dict]:
     """LH 청약플러스: javascript:fileDownLoad('파일ID') 패턴 + 확장자 fallback."""
     files = []
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
-        m = re.search(r"fileDownLoad\(['\"](\d+)['\"]\)", href)
+    for href, text in anchors:
+        m = _LH_FILE_RE.search(href)
         if m:
             file_id = m.group(1)
-            name = a.get_text(strip=True) or f"file_{file_id}"
+            name = text or f"file_{file_id}"
             url = f"{_LH_BASE}/lhapply/lhFile.do?fileid={file_id}"
             files.append({"name": name, "url": url})
             continue
 
         # 표준 href에 확장자가 있는 경우 (fallback)
         if any(ext in href.lower() for ext in _DOC_EXTS):
-            abs_url = urljoin(base_url, href) if not href.startswith("http") else href
-            name = a.get_text(strip=True) or href.rsplit("/", 1)[-1]
-            files.append({"name": name, "url": abs_url})
+            name = text or href.rsplit("/", 1)[-1]
+            files.append({"name": name, "url": _absolute(href, base_url)})
     return files
 
 
-def _extract_ih_links(soup, base_url: str) -> list[dict]:
+def _extract_ih_links(anchors: list[tuple[str, str]], base_url: str) -> list[dict]:
     """IH 인천도시공사: FileDown 서블릿 패턴 + 텍스트/href 확장자."""
     files = []
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
-        name = a.get_text(strip=True)
-
+    for href, name in anchors:
         # FileDown/fileDown/download 서블릿 패턴
-        if re.search(r"(?:file|File)Down|download", href, re.I):
-            abs_url = urljoin(base_url, href) if not href.startswith("http") else href
-            files.append({"name": name or "file", "url": abs_url})
+        if _IH_DOWNLOAD_RE.search(href):
+            files.append({"name": name or "file", "url": _absolute(href, base_url)})
             continue
 
         # <a> 텍스트에 문서 확장자가 있는 경우
-        if name and any(name.lower().endswith(ext) for ext in _DOC_EXTS):
-            abs_url = urljoin(base_url, href) if not href.startswith("http") else href
-            files.append({"name": name, "url": abs_url})
+        if name and name.lower().endswith(_DOC_EXTS):
+            files.append({"name": name, "url": _absolute(href, base_url)})
             continue
 
         # href에 확장자가 있는 경우 (fallback)
         if any(ext in href.lower() for ext in _DOC_EXTS):
-            abs_url = urljoin(base_url, href) if not href.startswith("http") else href
-            files.append({"name": name or href.rsplit("/", 1)[-1], "url": abs_url})
+            files.append({"name": name or href.rsplit("/", 1)[-1], "url": _absolute(href, base_url)})
     return files
 
 
+_EXTRACTORS = {"lh": _extract_lh_links, "ih": _extract_ih_links}
+
+
+def parse_detail(content: bytes, encoding: str | None, site: str, base_url: str) -> dict:
+    """상세 페이지 원본 → {"files", "html_text"} (실행기에서 호출 — 모듈 최상위 함수라 pickle 가능)."""
+    anchors, text = _parse_html(content.decode(encoding or "utf-8", errors="replace"))
+    return {"files": _EXTRACTORS[site](anchors, base_url), "html_text": text[:_MAX_TEXT_LENGTH]}
+
+
+# ---------------------------------------------------------------------------
+# 파싱 실행기 (프로세스 전체 공유, 최초 사용 시 생성)
+# ---------------------------------------------------------------------------
+_PARSE_EXECUTOR: Executor | None = None
+
+
+def _get_parse_executor() -> Executor:
+    global _PARSE_EXECUTOR
+    if _PARSE_EXECUTOR is None:
+        workers = SCRAPE_PARSE_WORKERS or None
+        if SCRAPE_PARSE_EXECUTOR == "process":
+            _PARSE_EXECUTOR = ProcessPoolExecutor(max_workers=workers)
+        else:
+            if SCRAPE_PARSE_EXECUTOR != "thread":
+                logger.warning(f"SCRAPE_PARSE_EXECUTOR '{SCRAPE_PARSE_EXECUTOR}' 알 수 없음 — thread 사용")
+            _PARSE_EXECUTOR = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse")
+    return _PARSE_EXECUTOR
+
+
+def shutdown_parse_executor() -> None:
+    """파싱 실행기 종료 (배치 종료 시 호출, 이후 사용 시 새로 생성)."""
+    global _PARSE_EXECUTOR
+    if _PARSE_EXECUTOR is not None:
+        _PARSE_EXECUTOR.shutdown(wait=True, cancel_futures=True)
+        _PARSE_EXECUTOR = None
+
+
+# ---------------------------------------------------------------------------
+# 상세 페이지 캐시 (URL별 검증자 + 본문 해시 + 추출 결과)
+# ---------------------------------------------------------------------------
+# 추출 로직이 바뀌면 올려서 기존 캐시 결과를 무효화 (파서 백엔드가 바뀌어도 캐시 키가 달라짐)
+_SCRAPE_CACHE_VERSION = 1
+
+_SCRAPE_STATS = {"not_modified": 0, "unchanged": 0, "parsed": 0}
+
+
+class ScrapeCache:
+    """상세 페이지 (URL, 추출기)별 ETag/Last-Modified, 본문 해시, 추출 결과를 저장하는 SQLite 캐시 (최근 접근 기준 LRU 제거)."""
+
+    def __init__(self, path: str, max_entries: int = 5000):
+        self._path = path
+        self._max_entries = max_entries
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # 이전 스키마(url 단독 키) 테이블은 백엔드별 항목이 서로 덮어쓰므로 폐기
+            conn.execute("DROP TABLE IF EXISTS pages")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS scraped_pages ("
+                " url TEXT NOT NULL, parser TEXT NOT NULL, etag TEXT, last_modified TEXT,"
+                " body_hash TEXT NOT NULL, result TEXT NOT NULL,"
+                " stored_at REAL NOT NULL, accessed_at REAL NOT NULL,"
+                " PRIMARY KEY (url, parser))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_scraped_pages_accessed ON scraped_pages(accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, url: str, parser: str) -> dict | None:
+        """같은 추출기(parser)로 저장된 항목 {"etag", "last_modified", "body_hash", "result"}. 없으면 None."""
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT etag, last_modified, body_hash, result FROM scraped_pages WHERE url = ? AND parser = ?",
+                    (url, parser),
+                ).fetchone()
+            if row is None:
+                return None
+            etag, last_modified, body_hash, result = row
+            return {"etag": etag, "last_modified": last_modified, "body_hash": body_hash, "result": json.loads(result)}
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"스크래핑 캐시 조회 실패: {e}")
+            return None
+
+    def touch(self, url: str, parser: str, etag: str | None, last_modified: str | None) -> None:
+        """재사용한 항목의 접근 시각과 검증자를 갱신합니다."""
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "UPDATE scraped_pages SET accessed_at = ?, etag = COALESCE(?, etag),"
+                    " last_modified = COALESCE(?, last_modified) WHERE url = ? AND parser = ?",
+                    (time.time(), etag, last_modified, url, parser),
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"스크래핑 캐시 갱신 실패: {e}")
+
+    def set(self, url: str, parser: str, etag: str | None, last_modified: str | None,
+            body_hash: str, result: dict) -> None:
+        """추출 결과를 저장하고, 최대 건수를 넘으면 가장 오래 접근하지 않은 항목부터 제거합니다."""
+        now = time.time()
+        try:
+            body = json.dumps(result, ensure_ascii=False)
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO scraped_pages"
+                    " (url, parser, etag, last_modified, body_hash, result, stored_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, parser, etag, last_modified, body_hash, body, now, now),
+                )
+                (count,) = conn.execute("SELECT COUNT(*) FROM scraped_pages").fetchone()
+                if count > self._max_entries:
+                    conn.execute(
+                        "DELETE FROM scraped_pages WHERE rowid IN ("
+                        " SELECT rowid FROM scraped_pages ORDER BY accessed_at ASC LIMIT ?)",
+                        (count - self._max_entries,),
+                    )
+                conn.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"스크래핑 캐시 저장 실패: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_scrape_cache: ScrapeCache | None = None
+
+
+def get_scrape_cache() -> ScrapeCache | None:
+    """프로세스 공유 캐시 지연 초기화. SCRAPE_CACHE_PATH가 비어있으면 None."""
+    global _scrape_cache
+    if _scrape_cache is None and SCRAPE_CACHE_PATH:
+        _scrape_cache = ScrapeCache(SCRAPE_CACHE_PATH, SCRAPE_CACHE_MAX_ENTRIES)
+    return _scrape_cache
+
+
+def scrape_stats() -> dict[str, int]:
+    """프로세스 시작 이후 상세 페이지 처리 통계 (304 재사용 / 본문 동일 재사용 / 파싱)."""
+    return dict(_SCRAPE_STATS)
+
+
 # ---------------------------------------------------------------------------
 # 공통 스크래핑 스켈레톤
 # ---------------------------------------------------------------------------
-async def _scrape_detail(url: str, extract_links, client: httpx.AsyncClient | None = None) -> dict:
-    """상세 페이지에서 첨부파일 URL + 본문 텍스트를 추출하는 공통 로직."""
+async def _scrape_detail(url: str, site: str, client: httpx.AsyncClient | None = None) -> dict:
+    """상세 페이지에서 첨부파일 URL + 본문 텍스트를 추출하는 공통 로직.
+
+    요청 구간은 사이트별 AdaptiveLimiter로 동시성을, 호스트별 토큰 버킷으로 속도를 제한하며,
+    429/5xx/timeout은 과부하 신호로 전달하여 동시성을 줄입니다.
+    캐시된 URL은 조건부 요청으로 조회하여 304이거나 본문 해시가 같으면 이전 결과를 반환하고,
+    그 외에는 리미터 슬롯을 반납한 뒤 파싱 실행기에서 파싱합니다.
+    """
     result = {"files": [], "html_text": ""}
 
     if not url:
         return result
 
+    limiter = _get_scrape_limiter(url)
+    cache = get_scrape_cache()
+    parser = f"{site}:{PARSER_BACKEND}:v{_SCRAPE_CACHE_VERSION}"
     try:
-        if BeautifulSoup is None:
-            logger.warning("beautifulsoup4 미설치 — HTML 파싱 건너뜀")
+        if _parse_html is None:
+            logger.warning("HTML 파서(selectolax/lxml/beautifulsoup4) 미설치 — HTML 파싱 건너뜀")
             return result
 
-        if client:
-            resp = await client.get(url)
-            resp.raise_for_status()
-        else:
-            async with create_scrape_client() as c:
-                resp = await c.get(url)
+        # SQLite 조회·커밋은 이벤트 루프를 막지 않도록 스레드에서 실행
+        cached = await asyncio.to_thread(cache.get, url, parser) if cache is not None else None
+        headers = {}
+        if cached and cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        async with limiter.slot():
+            await throttle(url)
+            resp = await (client or get_scrape_client(url)).get(url, headers=headers)
+            if not (cached and resp.status_code == 304):
                 resp.raise_for_status()
 
-        soup = BeautifulSoup(resp.text, "html.parser")
-
-        result["files"] = extract_links(soup, url)
-
-        # 본문 텍스트 추출
-        body = soup.find("div", class_=re.compile(r"cont|detail|view|body", re.I))
-        text = body.get_text(separator="\n", strip=True) if body else soup.get_text(separator="\n", strip=True)
-        result["html_text"] = text[:_MAX_TEXT_LENGTH]
+        etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+        if cached and resp.status_code == 304:
+            _SCRAPE_STATS["not_modified"] += 1
+            await asyncio.to_thread(cache.touch, url, parser, etag, last_modified)
+            return cached["result"]
+
+        body_hash = hashlib.sha256(resp.content).hexdigest()
+        if cached and cached["body_hash"] == body_hash:
+            _SCRAPE_STATS["unchanged"] += 1
+            await asyncio.to_thread(cache.touch, url, parser, etag, last_modified)
+            return cached["result"]
+
+        result = await asyncio.get_running_loop().run_in_executor(
+            _get_parse_executor(), parse_detail, resp.content, resp.encoding, site, url,
+        )
+        _SCRAPE_STATS["parsed"] += 1
+        if cache is not None:
+            await asyncio.to_thread(cache.set, url, parser, etag, last_modified, body_hash, result)
 
     except (httpx.HTTPError, Exception) as e:
+        if _is_overload_error(e):
+            limiter.record_overload(type(e).__name__)
         logger.warning(f"상세 페이지 스크래핑 실패: {url} → {e}")
 
     return result
@@ -131,9 +438,9 @@ async def _scrape_detail(url: str, extract_links, client: httpx.AsyncClient | No
 # ---------------------------------------------------------------------------
 async def scrape_lh_detail(dtl_url: str, client: httpx.AsyncClient | None = None) -> dict:
     """LH 청약플러스 상세 페이지에서 첨부파일 URL 추출."""
-    return await _scrape_detail(dtl_url, _extract_lh_links, client)
+    return await _scrape_detail(dtl_url, "lh", client)
 
 
 async def scrape_ih_detail(link_url: str, client: httpx.AsyncClient | None = None) -> dict:
     """IH 공고 페이지에서 첨부파일 URL 추출."""
-    return await _scrape_detail(link_url, _extract_ih_links, client)
+    return await _scrape_detail(link_url, "ih", client)
@@ -1,48 +1,297 @@
-"""HTTP 재시도 유틸리티 — API 일시 장애 시 자동 재시도."""
+"""HTTP 재시도 유틸리티 — API 일시 장애 시 자동 재시도.
+
+- full-jitter exponential backoff + Retry-After 헤더 준수
+- 재시도 예산: 일정 시간(실행) 단위로 전체 재시도 횟수를 제한하여 장애 시 재시도 폭주 방지
+- 호스트별 서킷 브레이커: 실패율이 임계치를 넘으면 요청 없이 즉시 실패, 일정 시간 후 1건으로 복구 확인
+- 공유 클라이언트 풀: 프로세스 전체에서 (용도, host)별 AsyncClient를 재사용 (keep-alive, HTTP/2)
+"""
 import asyncio
+import importlib.util
 import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
 import httpx
 
+from rate_limit import AdaptiveLimiter, throttle
+
 logger = logging.getLogger(__name__)
 
 RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
 MAX_RETRIES = 3
 BASE_DELAY = 2  # seconds
+MAX_RETRY_AFTER = 60  # Retry-After 최대 대기 (seconds)
+
+RETRY_BUDGET_MAX = 50  # 예산 구간당 전체 재시도 허용 횟수
+RETRY_BUDGET_WINDOW = 600  # 예산 자동 초기화 주기 (seconds, 장기 실행 MCP 서버용)
+
+CIRCUIT_WINDOW = 20  # 실패율 계산에 쓰는 최근 요청 수
+CIRCUIT_MIN_REQUESTS = 10  # 이 수 이상 쌓여야 서킷 판단
+CIRCUIT_FAILURE_RATE = 0.5  # 이 비율 이상 실패 시 서킷 open
+CIRCUIT_OPEN_SECONDS = 30  # open 유지 후 half-open 전환까지 (seconds)
+
+# 공유 클라이언트 연결 풀 설정 (host별 클라이언트 1개 → host별 풀 제한)
+POOL_MAX_CONNECTIONS = 20
+POOL_MAX_KEEPALIVE = 10
+KEEPALIVE_EXPIRY = 30.0  # seconds
+# h2 패키지가 설치되어 있으면 HTTPS 요청에 HTTP/2 사용 (httpx[http2])
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# (용도, host) → 공유 AsyncClient
+_SHARED_CLIENTS: dict[tuple[str, str], httpx.AsyncClient] = {}
+
+# 진행 중인 동일 요청 key → 공유 Task (singleflight)
+_INFLIGHT: dict[tuple, asyncio.Task] = {}
+
+
+class CircuitOpenError(httpx.HTTPError):
+    """호스트 서킷이 열려 있어 요청을 보내지 않고 실패함."""
+
+
+class RetryBudget:
+    """실행 단위 재시도 예산. 소진되면 재시도 없이 즉시 실패합니다.
+
+    배치는 실행 시작 시 reset()하고, 장기 실행 프로세스는 window초마다 자동 초기화됩니다.
+    """
+
+    def __init__(self, max_retries: int, window: float):
+        self.max_retries = max_retries
+        self.window = window
+        self.used = 0
+        self._started = time.monotonic()
+
+    def reset(self) -> None:
+        self.used = 0
+        self._started = time.monotonic()
+
+    def try_spend(self) -> bool:
+        if time.monotonic() - self._started >= self.window:
+            self.reset()
+        if self.used >= self.max_retries:
+            if self.used == self.max_retries:
+                self.used += 1  # 소진 로그는 구간당 1회만
+                logger.warning(f"재시도 예산 소진 ({self.max_retries}회) — 이후 실패는 재시도 없이 반환")
+            return False
+        self.used += 1
+        return True
+
+
+RETRY_BUDGET = RetryBudget(RETRY_BUDGET_MAX, RETRY_BUDGET_WINDOW)
+
+
+def reset_retry_budget() -> None:
+    """재시도 예산을 초기화합니다 (배치 실행 시작 시 호출)."""
+    RETRY_BUDGET.reset()
+
+
+class CircuitBreaker:
+    """호스트별 서킷 브레이커.
+
+    closed: 최근 CIRCUIT_WINDOW건 중 실패율이 CIRCUIT_FAILURE_RATE 이상이면 open
+    open: CIRCUIT_OPEN_SECONDS 동안 요청 없이 CircuitOpenError
+    half_open: probe 1건만 허용 → 성공 시 closed, 실패 시 다시 open
+    """
+
+    def __init__(self, host: str):
+        self.host = host
+        self.state = "closed"
+        self._results: deque[bool] = deque(maxlen=CIRCUIT_WINDOW)
+        self._opened_at = 0.0
+        self._probe_started: float | None = None
+
+    def before_request(self) -> None:
+        now = time.monotonic()
+        if self.state == "open":
+            if now - self._opened_at < CIRCUIT_OPEN_SECONDS:
+                raise CircuitOpenError(f"서킷 open — {self.host} 요청 차단")
+            self.state = "half_open"
+            self._probe_started = None
+        if self.state == "half_open":
+            # probe가 진행 중이면 차단 (probe가 취소되어 결과가 없으면 일정 시간 후 재시도 허용)
+            if self._probe_started is not None and now - self._probe_started < CIRCUIT_OPEN_SECONDS:
+                raise CircuitOpenError(f"서킷 half-open — {self.host} 복구 확인 중")
+            self._probe_started = now
+            logger.info(f"서킷 half-open — {self.host} 복구 확인 요청")
+
+    def record(self, success: bool) -> None:
+        if self.state == "half_open":
+            if success:
+                self.state = "closed"
+                self._results.clear()
+                logger.info(f"서킷 closed — {self.host} 복구 확인")
+            else:
+                self._open()
+            return
+        self._results.append(success)
+        if self.state == "closed" and len(self._results) >= CIRCUIT_MIN_REQUESTS:
+            failure_rate = self._results.count(False) / len(self._results)
+            if failure_rate >= CIRCUIT_FAILURE_RATE:
+                self._open()
+
+    def _open(self) -> None:
+        self.state = "open"
+        self._opened_at = time.monotonic()
+        self._probe_started = None
+        logger.warning(f"서킷 open — {self.host} 실패율 임계 초과, {CIRCUIT_OPEN_SECONDS}초간 요청 차단")
+
+
+_BREAKERS: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    breaker = _BREAKERS.get(host)
+    if breaker is None:
+        breaker = CircuitBreaker(host)
+        _BREAKERS[host] = breaker
+    return breaker
+
+
+def get_shared_client(
+    url: str,
+    profile: str = "api",
+    timeout: float = 30.0,
+    headers: dict | None = None,
+    follow_redirects: bool = False,
+) -> httpx.AsyncClient:
+    """(profile, host)별 프로세스 공유 AsyncClient를 반환합니다 (없으면 생성).
+
+    매 호출마다 클라이언트를 새로 열면 TCP/TLS 핸드셰이크가 반복되므로,
+    배치와 MCP 서버 모두 이 함수로 연결을 재사용합니다.
+    timeout/headers/follow_redirects는 최초 생성 시에만 적용됩니다.
+    종료 시 aclose_shared_clients()로 정리합니다.
+    """
+    key = (profile, urlparse(url).netloc)
+    client = _SHARED_CLIENTS.get(key)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=timeout,
+            headers=headers,
+            follow_redirects=follow_redirects,
+            http2=_HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=POOL_MAX_KEEPALIVE,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+        )
+        _SHARED_CLIENTS[key] = client
+    return client
+
+
+async def aclose_shared_clients() -> None:
+    """공유 클라이언트를 모두 닫습니다 (배치 종료 / MCP 서버 종료 시)."""
+    clients = list(_SHARED_CLIENTS.values())
+    _SHARED_CLIENTS.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"HTTP 클라이언트 종료 실패: {e}")
+
+
+def _retry_after_seconds(resp: httpx.Response) -> float | None:
+    """Retry-After 헤더(초 또는 HTTP-date)를 대기 시간(초)으로 변환."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(tz=timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+def _backoff_delay(attempt: int, resp: httpx.Response | None = None) -> float:
+    """Retry-After가 있으면 그 값, 없으면 full jitter: uniform(0, BASE_DELAY * 2^attempt)."""
+    if resp is not None:
+        retry_after = _retry_after_seconds(resp)
+        if retry_after is not None:
+            return retry_after
+    return random.uniform(0, BASE_DELAY * (2 ** attempt))
 
 
 async def request_with_retry(
     client: httpx.AsyncClient,
     method: str,
     url: str,
+    limiter: AdaptiveLimiter | None = None,
     **kwargs,
 ) -> httpx.Response:
     """HTTP 요청을 재시도 로직과 함께 실행합니다.
 
-    재시도 대상: HTTP 429, 500, 502, 503, 504 + httpx.TimeoutException
-    전략: 최대 3회, exponential backoff (2s → 4s → 8s)
+    재시도 대상: HTTP 429, 500, 502, 503, 504 + httpx.TimeoutException/ConnectError
+    전략: 최대 3회, full-jitter exponential backoff (0~2s → 0~4s → 0~8s)
+          응답에 Retry-After가 있으면 그 값을 우선 (최대 MAX_RETRY_AFTER초)
+    재시도 예산(RETRY_BUDGET)이 소진되면 재시도 없이 즉시 실패합니다.
+    호스트 서킷이 열려 있으면 요청 없이 CircuitOpenError를 발생시킵니다.
+    limiter: 지정 시 재시도 대상 응답/예외를 과부하 신호로 전달 (AIMD 동시성 감소)
+    재시도를 포함한 모든 시도는 호스트별 토큰 버킷(rate_limit.throttle)을 거칩니다.
     """
-    last_exc = None
+    breaker = get_breaker(urlparse(url).netloc)
     for attempt in range(1 + MAX_RETRIES):
+        breaker.before_request()
+        await throttle(url)
         try:
             resp = await getattr(client, method.lower())(url, **kwargs)
-            if resp.status_code in RETRY_STATUS_CODES and attempt < MAX_RETRIES:
-                delay = BASE_DELAY * (2 ** attempt)
-                logger.warning(
-                    f"HTTP {resp.status_code} — {delay}초 후 재시도 ({attempt + 1}/{MAX_RETRIES}): {url}"
-                )
-                await asyncio.sleep(delay)
-                continue
-            resp.raise_for_status()
-            return resp
         except (httpx.TimeoutException, httpx.ConnectError) as e:
-            last_exc = e
-            if attempt < MAX_RETRIES:
-                delay = BASE_DELAY * (2 ** attempt)
-                label = "Timeout" if isinstance(e, httpx.TimeoutException) else "ConnectError"
+            breaker.record(False)
+            label = "Timeout" if isinstance(e, httpx.TimeoutException) else "ConnectError"
+            if limiter is not None:
+                limiter.record_overload(label)
+            if attempt >= MAX_RETRIES or not RETRY_BUDGET.try_spend():
+                raise
+            delay = _backoff_delay(attempt)
+            logger.warning(
+                f"{label} — {delay:.1f}초 후 재시도 ({attempt + 1}/{MAX_RETRIES}): {url}"
+            )
+            await asyncio.sleep(delay)
+            continue
+
+        if resp.status_code in RETRY_STATUS_CODES:
+            breaker.record(False)
+            if limiter is not None:
+                limiter.record_overload(f"HTTP {resp.status_code}")
+            if attempt < MAX_RETRIES and RETRY_BUDGET.try_spend():
+                delay = _backoff_delay(attempt, resp)
                 logger.warning(
-                    f"{label} — {delay}초 후 재시도 ({attempt + 1}/{MAX_RETRIES}): {url}"
+                    f"HTTP {resp.status_code} — {delay:.1f}초 후 재시도 ({attempt + 1}/{MAX_RETRIES}): {url}"
                 )
                 await asyncio.sleep(delay)
-            else:
-                raise
-    raise last_exc  # unreachable in normal flow, safety net
+                continue
+        else:
+            breaker.record(True)
+        resp.raise_for_status()
+        return resp
+    raise RuntimeError("unreachable")  # safety net
+
+
+async def singleflight(key: tuple, factory):
+    """같은 key의 작업이 진행 중이면 새로 시작하지 않고 그 결과를 공유합니다.
+
+    key: (method, url, ...) 형태의 tuple — factory가 클라이언트를 쓰면 id(client)를 포함해야
+        다른 클라이언트(호출부 소유, 이미 닫혔을 수 있음)로 요청한 호출자끼리 섞이지 않습니다
+    factory: 인자 없이 호출하면 coroutine을 반환하는 callable (첫 호출자만 실행)
+    한 호출자가 취소되어도 공유 작업은 취소되지 않습니다 (asyncio.shield).
+    """
+    task = _INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        _INFLIGHT[key] = task
+
+        def _on_done(t: asyncio.Task):
+            _INFLIGHT.pop(key, None)
+            # 모든 호출자가 취소된 경우에도 "exception was never retrieved" 경고 방지
+            if not t.cancelled():
+                t.exception()
+
+        task.add_done_callback(_on_done)
+    else:
+        logger.debug(f"진행 중인 동일 요청 공유: {key[1]}")
+    return await asyncio.shield(task)
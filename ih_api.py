@@ -1,10 +1,12 @@
 """공통 IH(인천도시공사) API 로직 — server/lh_mcp.py 와 batch/ 에서 사용합니다."""
 import asyncio
 import logging
+from typing import AsyncIterator
 from urllib.parse import urlparse, urlencode, parse_qs
 import httpx
-from config import OPEN_API_KEY as API_KEY
-from http_utils import request_with_retry
+from config import OPEN_API_KEY as API_KEY, LISTING_CACHE_TTL
+from http_utils import get_shared_client
+from response_cache import cached_get_json
 
 NOTICE_URL = "https://apis.data.go.kr/B552831/ih/slls-posts"
 
@@ -42,7 +44,7 @@ async def fetch_ih_notices(
         endCrtrYmd: 조회 종료일 (YYYY-MM-DD, 필수)
         sj: 공고 제목 필터 키워드
         seNm: 공고 구분 (분양/임대, 빈 문자열이면 전체)
-        client: 외부 httpx.AsyncClient (None이면 내부 생성)
+        client: 외부 httpx.AsyncClient (None이면 프로세스 공유 클라이언트 사용)
 
     Returns:
         tuple[list[dict], int]: (공고 목록, 전체 페이지 수)
@@ -66,15 +68,7 @@ async def fetch_ih_notices(
     if seNm:
         params["seNm"] = seNm
 
-    async def _do_request(c: httpx.AsyncClient):
-        resp = await request_with_retry(c, "GET", NOTICE_URL, params=params)
-        return resp.json()
-
-    if client:
-        data = await _do_request(client)
-    else:
-        async with httpx.AsyncClient(timeout=30.0) as c:
-            data = await _do_request(c)
+    data = await cached_get_json(client or get_shared_client(NOTICE_URL), NOTICE_URL, params, LISTING_CACHE_TTL)
 
     # Swagger 명세 응답 구조:
     # { header: {resultCode, resultMsg}, body: {pageNo, numOfRows, totalPageNo, totalCount, posts: [...]} }
@@ -91,6 +85,59 @@ async def fetch_ih_notices(
     return items, total_pages
 
 
+async def iter_ih_notices(
+    startCrtrYmd: str = "",
+    endCrtrYmd: str = "",
+    sj: str = "",
+    seNm: str = "",
+    tyNm: str = "",
+    ordered: bool = False,
+) -> AsyncIterator[dict]:
+    """IH 공고를 전체 페이지 순회하며 페이지가 도착하는 대로 yield합니다 (fetch_all_ih_notices의 스트리밍 버전).
+
+    ordered: False이면 페이지 도착 순서, True이면 페이지 번호 순서.
+    소비자가 도중에 멈추면 남은 페이지 조회를 취소합니다 —
+    break로 빠져나올 때는 contextlib.aclosing()으로 감싸 즉시 정리되도록 합니다.
+    인자는 fetch_all_ih_notices()와 동일합니다.
+    """
+    common_kw = dict(numOfRows=30, startCrtrYmd=startCrtrYmd, endCrtrYmd=endCrtrYmd, sj=sj, seNm=seNm)
+    client = get_shared_client(NOTICE_URL)
+
+    def _filtered(items: list[dict]) -> list[dict]:
+        return [item for item in items if item.get("tyNm") == tyNm] if tyNm else items
+
+    # 첫 페이지 조회 → total_pages 확인
+    items_p1, total_pages = await fetch_ih_notices(pageNo=1, client=client, **common_kw)
+    logger.info(f"IH API 페이지 1/{total_pages} 조회: {len(items_p1)}건")
+    for item in _filtered(items_p1):
+        yield item
+    if total_pages <= 1 or not items_p1:
+        return
+
+    # 나머지 페이지 병렬 조회
+    async def _page(p: int) -> tuple[int, list[dict] | Exception]:
+        try:
+            items, _ = await fetch_ih_notices(pageNo=p, client=client, **common_kw)
+            return p, items
+        except Exception as e:
+            return p, e
+
+    tasks = [asyncio.ensure_future(_page(p)) for p in range(2, total_pages + 1)]
+    try:
+        for next_page in (tasks if ordered else asyncio.as_completed(tasks)):
+            p, r = await next_page
+            if isinstance(r, Exception):
+                logger.warning(f"IH API 페이지 {p} 조회 실패: {r}")
+                continue
+            logger.info(f"IH API 페이지 {p}/{total_pages} 조회: {len(r)}건")
+            for item in _filtered(r):
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
 async def fetch_all_ih_notices(
     startCrtrYmd: str = "",
     endCrtrYmd: str = "",
@@ -101,33 +148,11 @@ async def fetch_all_ih_notices(
     """IH 공고를 전체 페이지 순회하여 모두 조회합니다 (배치용).
 
     API numOfRows 최대값이 30이므로 페이지네이션으로 전체 수집합니다.
+    결과는 페이지 번호 순서이며, iter_ih_notices(ordered=True)를 모두 모은 것과 같습니다.
 
     Args:
         tyNm: 유형명 클라이언트 사이드 필터 (예: '일반임대'). API 미지원 → 조회 후 필터링.
     """
-    common_kw = dict(numOfRows=30, startCrtrYmd=startCrtrYmd, endCrtrYmd=endCrtrYmd, sj=sj, seNm=seNm)
-
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        # 첫 페이지 조회 → total_pages 확인
-        items_p1, total_pages = await fetch_ih_notices(pageNo=1, client=client, **common_kw)
-        all_items = list(items_p1)
-        logger.info(f"IH API 페이지 1/{total_pages} 조회: {len(items_p1)}건")
-
-        # 나머지 페이지 병렬 조회
-        if total_pages > 1 and items_p1:
-            remaining = await asyncio.gather(*[
-                fetch_ih_notices(pageNo=p, client=client, **common_kw)
-                for p in range(2, total_pages + 1)
-            ], return_exceptions=True)
-            for i, r in enumerate(remaining, start=2):
-                if isinstance(r, Exception):
-                    logger.warning(f"IH API 페이지 {i} 조회 실패: {r}")
-                else:
-                    items, _ = r
-                    all_items.extend(items)
-                    logger.info(f"IH API 페이지 {i}/{total_pages} 조회: {len(items)}건")
-
-    if tyNm:
-        all_items = [item for item in all_items if item.get("tyNm") == tyNm]
-
-    return all_items
+    return [item async for item in iter_ih_notices(
+        startCrtrYmd=startCrtrYmd, endCrtrYmd=endCrtrYmd, sj=sj, seNm=seNm, tyNm=tyNm, ordered=True,
+    )]
@@ -1,16 +1,23 @@
 """공통 LH API 로직 — server/lh_mcp.py 와 batch/ 양쪽에서 공유합니다."""
 import asyncio
 import logging
+from typing import AsyncIterator
 import httpx
 from datetime import datetime, timedelta
-from config import OPEN_API_KEY as API_KEY
-from http_utils import request_with_retry
+from config import OPEN_API_KEY as API_KEY, LISTING_CACHE_TTL, SUPPLY_CACHE_TTL
+from http_utils import get_shared_client
+from rate_limit import AdaptiveLimiter
+from response_cache import cached_get_json
 
 NOTICE_URL = "http://apis.data.go.kr/B552555/lhLeaseNoticeInfo1/lhLeaseNoticeInfo1"
 SUPPLY_URL = "http://apis.data.go.kr/B552555/lhLeaseNoticeSplInfo1/getLeaseNoticeSplInfo1"
 
 # 공급정보 API 동시 요청 수 제한 (429 Too Many Requests 방지)
-_SUPPLY_SEMAPHORE = asyncio.Semaphore(5)
+# 초기 5에서 시작해 응답 상태에 따라 1~20 사이로 자동 조절 (AIMD)
+_SUPPLY_LIMITER = AdaptiveLimiter("lh_supply", initial=5, min_limit=1, max_limit=20)
+
+# 전체 페이지 순회 시 목록 API 동시 요청 수
+_PAGE_CONCURRENCY = 3
 
 logger = logging.getLogger(__name__)
 
@@ -88,7 +95,9 @@ async def _fetch_supply(client: httpx.AsyncClient, item: dict, tp_code: str) ->
     """공고 1건의 공급정보를 조회.
 
     SPL_INF_TP_CD 또는 CCR_CNNT_SYS_DS_CD가 없으면 API 호출 없이 빈값 반환.
-    Semaphore로 동시 요청 수를 제한하여 429 Too Many Requests 방지.
+    AdaptiveLimiter로 동시 요청 수를 제한하여 429 Too Many Requests 방지.
+    응답은 디스크 캐시(SUPPLY_CACHE_TTL)에 저장되며, 동시에 들어온 같은 공고 요청은
+    1회의 API 호출을 공유합니다.
 
     Returns:
         tuple[dict, list, str | None]: (컬럼 정보, 상세 목록, 에러 메시지 또는 None)
@@ -100,16 +109,19 @@ async def _fetch_supply(client: httpx.AsyncClient, item: dict, tp_code: str) ->
     if not spl_tp or not ccr_cd:
         return {}, [], None
 
+    params = {
+        "ServiceKey": API_KEY,
+        "SPL_INF_TP_CD": spl_tp,
+        "CCR_CNNT_SYS_DS_CD": ccr_cd,
+        "PAN_ID": pan_id,
+        "UPP_AIS_TP_CD": tp_code,
+    }
+
     try:
-        async with _SUPPLY_SEMAPHORE:
-            supply_resp = await request_with_retry(client, "GET", SUPPLY_URL, params={
-                "ServiceKey": API_KEY,
-                "SPL_INF_TP_CD": spl_tp,
-                "CCR_CNNT_SYS_DS_CD": ccr_cd,
-                "PAN_ID": pan_id,
-                "UPP_AIS_TP_CD": tp_code,
-            })
-        supply_data = supply_resp.json()
+        # 캐시 우선 조회, 같은 PAN_ID 요청이 진행 중이면 공유 (리미터 슬롯도 1개만 사용)
+        supply_data = await cached_get_json(
+            client, SUPPLY_URL, params, SUPPLY_CACHE_TTL, limiter=_SUPPLY_LIMITER,
+        )
         cols = _extract_ds_list(supply_data, 'dsList01Nm')
         supply_columns = cols[0] if cols else {}
         supply_details = _extract_supply_list(supply_data)
@@ -119,32 +131,65 @@ async def _fetch_supply(client: httpx.AsyncClient, item: dict, tp_code: str) ->
         return {}, [], str(e)
 
 
-async def fetch_lh_notices(
-    limit: int = 100,
-    page: int = 1,
-    tp_code: str = '13',
-    cnp_code: str = '28',
-    status: str = '공고중',
-    lookback_days: int = 0,
-    keyword: str = '',
-    client: httpx.AsyncClient | None = None,
-) -> list[dict]:
-    """LH 임대공고 목록을 조회하고, 공고별 공급유형 상세 정보를 함께 반환합니다.
+def _build_notice(item: dict, tp_code: str) -> dict:
+    """공고 목록 API 응답 1건을 공급정보 필드가 비어있는 공고 dict로 변환합니다."""
+    return {
+        "PAN_ID": item.get('PAN_ID', ''),
+        "PAN_NM": item.get('PAN_NM', ''),
+        "AIS_TP_CD": item.get('AIS_TP_CD', ''),
+        "AIS_TP_CD_NM": item.get('AIS_TP_CD_NM', ''),
+        "CNP_CD_NM": item.get('CNP_CD_NM', ''),
+        "PAN_SS": item.get('PAN_SS', ''),
+        "PAN_NT_ST_DT": item.get('PAN_NT_ST_DT', ''),
+        "CLSG_DT": item.get('CLSG_DT', ''),
+        "PAN_DT": item.get('PAN_DT', ''),
+        "DTL_URL": item.get('DTL_URL', ''),
+        "SPL_INF_TP_CD": item.get('SPL_INF_TP_CD', ''),
+        "CCR_CNNT_SYS_DS_CD": item.get('CCR_CNNT_SYS_DS_CD', ''),
+        "UPP_AIS_TP_CD": tp_code,
+        "supply_columns": {},
+        "supply_details": [],
+        "supply_error": None,
+    }
 
-    status: PAN_SS 필터값. 비어있으면 파라미터 자체를 제외하여 전체 조회.
-            API 실측 상태값: '공고중', '접수중', '접수마감'
-    lookback_days: 0이면 날짜 파라미터를 제외하여 현재 활성 공고 포함 조회.
-                   0보다 크면 PAN_ST_DT/PAN_ED_DT로 과거 마감 공고 조회.
-                   주의: 날짜 파라미터가 있으면 현재 활성 공고(공고중/접수중)가 제외됨.
-    keyword: 지정 시 공고 목록 조회 직후 필터링하여
-             필터된 건에 대해서만 공급정보 API를 병렬 호출합니다.
 
-    Returns:
-        list of dict: 각 공고의 기본 정보 + supply_columns + supply_details
+async def enrich_supply_one(notice: dict, client: httpx.AsyncClient | None = None) -> dict:
+    """공고 1건에 공급정보(supply_columns/supply_details/supply_error)를 채웁니다.
+
+    배치 파이프라인에서 공고별로 호출하며, notice dict를 직접 갱신하고 반환합니다.
     """
-    if not API_KEY:
-        raise EnvironmentError("OPEN_API_KEY 환경변수가 설정되지 않았습니다.")
+    supply_columns, supply_details, supply_error = await _fetch_supply(
+        client or get_shared_client(SUPPLY_URL), notice, notice.get("UPP_AIS_TP_CD", ""),
+    )
+    notice["supply_columns"] = supply_columns
+    notice["supply_details"] = supply_details
+    notice["supply_error"] = supply_error
+    return notice
+
 
+async def enrich_supply(notices: list[dict], client: httpx.AsyncClient | None = None) -> list[dict]:
+    """공고 목록에 공급정보(supply_columns/supply_details/supply_error)를 채웁니다.
+
+    fetch_lh_notices(with_supply=False)로 목록만 받은 뒤 지역 필터·PAN_ID 중복 제거를
+    거친 공고에 대해서만 호출하여 불필요한 공급정보 API 호출을 줄입니다.
+    notice dict를 직접 갱신하며, 편의상 같은 리스트를 반환합니다.
+    """
+    if not notices:
+        return notices
+    client = client or get_shared_client(SUPPLY_URL)
+    await asyncio.gather(*[enrich_supply_one(n, client) for n in notices])
+    return notices
+
+
+def _build_notice_params(
+    limit: int,
+    page: int,
+    tp_code: str,
+    cnp_code: str,
+    status: str,
+    lookback_days: int,
+) -> dict:
+    """공고 목록 API 요청 파라미터를 생성합니다."""
     notice_params: dict = {
         "ServiceKey": API_KEY,
         "PG_SZ": limit,
@@ -167,55 +212,191 @@ async def fetch_lh_notices(
         notice_params["PAN_ST_DT"] = (today - timedelta(days=lookback_days)).strftime('%Y.%m.%d')
         notice_params["PAN_ED_DT"] = today.strftime('%Y.%m.%d')
 
-    async def _do_fetch(c: httpx.AsyncClient):
-        notice_resp = await request_with_retry(c, "GET", NOTICE_URL, params=notice_params)
-        notice_data = notice_resp.json()
+    return notice_params
 
-        raw_list = _extract_ds_list(notice_data)
-        if not raw_list:
-            return []
 
-        if keyword:
-            raw_list = [n for n in raw_list if keyword in n.get('PAN_NM', '')]
+async def _fetch_notice_page(c: httpx.AsyncClient, notice_params: dict) -> tuple[list, int]:
+    """공고 목록 1페이지를 조회합니다.
 
-        if not raw_list:
-            return []
+    Returns:
+        tuple[list, int]: (원본 공고 목록, 전체 건수 — 각 행의 ALL_CNT, 없으면 현재 페이지 건수)
+    """
+    notice_data = await cached_get_json(c, NOTICE_URL, notice_params, LISTING_CACHE_TTL)
+    raw_list = _extract_ds_list(notice_data)
+    total_count = len(raw_list)
+    if raw_list:
+        try:
+            total_count = int(raw_list[0].get("ALL_CNT") or total_count)
+        except (TypeError, ValueError):
+            pass
+    return raw_list, total_count
 
-        supply_tasks = [_fetch_supply(c, item, tp_code) for item in raw_list]
-        supply_results = await asyncio.gather(*supply_tasks)
-        return raw_list, supply_results
 
-    if client:
-        result = await _do_fetch(client)
-    else:
-        async with httpx.AsyncClient(timeout=30.0) as c:
-            result = await _do_fetch(c)
+async def fetch_lh_notices(
+    limit: int = 100,
+    page: int = 1,
+    tp_code: str = '13',
+    cnp_code: str = '28',
+    status: str = '공고중',
+    lookback_days: int = 0,
+    keyword: str = '',
+    client: httpx.AsyncClient | None = None,
+    with_supply: bool = True,
+) -> list[dict]:
+    """LH 임대공고 목록을 조회하고, 공고별 공급유형 상세 정보를 함께 반환합니다.
 
-    if not result:
-        return []
-    raw_list, supply_results = result
-
-    results = []
-    for item, (supply_columns, supply_details, supply_error) in zip(raw_list, supply_results):
-        results.append({
-            "PAN_ID": item.get('PAN_ID', ''),
-            "PAN_NM": item.get('PAN_NM', ''),
-            "AIS_TP_CD": item.get('AIS_TP_CD', ''),
-            "AIS_TP_CD_NM": item.get('AIS_TP_CD_NM', ''),
-            "CNP_CD_NM": item.get('CNP_CD_NM', ''),
-            "PAN_SS": item.get('PAN_SS', ''),
-            "PAN_NT_ST_DT": item.get('PAN_NT_ST_DT', ''),
-            "CLSG_DT": item.get('CLSG_DT', ''),
-            "PAN_DT": item.get('PAN_DT', ''),
-            "DTL_URL": item.get('DTL_URL', ''),
-            "SPL_INF_TP_CD": item.get('SPL_INF_TP_CD', ''),
-            "CCR_CNNT_SYS_DS_CD": item.get('CCR_CNNT_SYS_DS_CD', ''),
-            "supply_columns": supply_columns,
-            "supply_details": supply_details,
-            "supply_error": supply_error,
-        })
-
-    return results
+    status: PAN_SS 필터값. 비어있으면 파라미터 자체를 제외하여 전체 조회.
+            API 실측 상태값: '공고중', '접수중', '접수마감'
+    lookback_days: 0이면 날짜 파라미터를 제외하여 현재 활성 공고 포함 조회.
+                   0보다 크면 PAN_ST_DT/PAN_ED_DT로 과거 마감 공고 조회.
+                   주의: 날짜 파라미터가 있으면 현재 활성 공고(공고중/접수중)가 제외됨.
+    keyword: 지정 시 공고 목록 조회 직후 필터링하여
+             필터된 건에 대해서만 공급정보 API를 병렬 호출합니다.
+    with_supply: False이면 공급정보 API를 호출하지 않고 목록만 반환합니다 (지연 조회).
+                 필터·중복 제거 후 enrich_supply()로 공급정보를 채웁니다.
+
+    Returns:
+        list of dict: 각 공고의 기본 정보 + supply_columns + supply_details
+    """
+    if not API_KEY:
+        raise EnvironmentError("OPEN_API_KEY 환경변수가 설정되지 않았습니다.")
+
+    notice_params = _build_notice_params(limit, page, tp_code, cnp_code, status, lookback_days)
+
+    c = client or get_shared_client(NOTICE_URL)
+    raw_list, _ = await _fetch_notice_page(c, notice_params)
+    if keyword:
+        raw_list = [n for n in raw_list if keyword in n.get('PAN_NM', '')]
+
+    notices = [_build_notice(item, tp_code) for item in raw_list]
+    if with_supply:
+        await enrich_supply(notices, c)
+    return notices
+
+
+async def iter_lh_notices(
+    tp_code: str = '13',
+    cnp_code: str = '28',
+    status: str = '공고중',
+    lookback_days: int = 0,
+    keyword: str = '',
+    client: httpx.AsyncClient | None = None,
+    with_supply: bool = True,
+    page_size: int = 100,
+    ordered: bool = False,
+    strict: bool = False,
+) -> AsyncIterator[dict]:
+    """LH 공고를 전체 페이지 순회하며 준비되는 대로 yield합니다 (fetch_all_lh_notices의 스트리밍 버전).
+
+    페이지가 도착하는 즉시 해당 페이지 공고의 공급정보 조회를 시작하므로
+    전체 조회를 기다리지 않고 첫 결과를 받을 수 있습니다.
+    ordered: False이면 공급정보 조회가 끝난 순서, True이면 페이지·목록 순서 (앞 공고가 늦으면 대기).
+    소비자가 도중에 멈추면 남은 페이지·공급정보 조회를 취소합니다 —
+    break로 빠져나올 때는 contextlib.aclosing()으로 감싸 즉시 정리되도록 합니다.
+    strict: True이면 페이지 조회 실패 시 예외를 올립니다 (False면 경고 후 해당 페이지 건너뜀).
+    나머지 인자는 fetch_lh_notices()와 동일합니다.
+    """
+    if not API_KEY:
+        raise EnvironmentError("OPEN_API_KEY 환경변수가 설정되지 않았습니다.")
+
+    c = client or get_shared_client(NOTICE_URL)
+    supply_client = client or get_shared_client(SUPPLY_URL)
+    sem = asyncio.Semaphore(_PAGE_CONCURRENCY)
+    seen: set[str] = set()
+    tasks: list[asyncio.Future] = []
+
+    def _params(page: int) -> dict:
+        return _build_notice_params(page_size, page, tp_code, cnp_code, status, lookback_days)
+
+    def _notice_futures(raw: list) -> list[asyncio.Future]:
+        """페이지 원본 → 새 공고별 Future (공급정보 조회 작업 또는 즉시 완료). 페이지 경계 중복은 먼저 온 쪽 유지."""
+        futures = []
+        for item in raw:
+            notice = _build_notice(item, tp_code)
+            pan_id = notice["PAN_ID"]
+            if not pan_id or pan_id in seen or (keyword and keyword not in notice["PAN_NM"]):
+                continue
+            seen.add(pan_id)
+            if with_supply:
+                future = asyncio.ensure_future(enrich_supply_one(notice, supply_client))
+                tasks.append(future)
+            else:
+                future = asyncio.get_running_loop().create_future()
+                future.set_result(notice)
+            futures.append(future)
+        return futures
+
+    async def _page(p: int) -> list[asyncio.Future]:
+        async with sem:
+            raw, _ = await _fetch_notice_page(c, _params(p))
+        return _notice_futures(raw)
+
+    # 첫 페이지 조회 → 전체 건수 확인 후 나머지 페이지를 동시 요청 수 제한 내에서 병렬 조회
+    raw_p1, total_count = await _fetch_notice_page(c, _params(1))
+    total_pages = max(1, -(-total_count // page_size)) if raw_p1 else 1
+    if total_pages > 1:
+        logger.info(f"LH API 전체 {total_count}건 — {total_pages}페이지 조회 (tp_code={tp_code})")
+
+    try:
+        first = asyncio.get_running_loop().create_future()
+        first.set_result(_notice_futures(raw_p1))
+        pages = [first] + [asyncio.ensure_future(_page(p)) for p in range(2, total_pages + 1)]
+        tasks.extend(pages[1:])
+        page_numbers = {id(page): p for p, page in enumerate(pages, start=1)}
+
+        def _page_result(page: asyncio.Future) -> list[asyncio.Future]:
+            try:
+                return page.result()
+            except Exception as e:
+                if strict:
+                    raise
+                logger.warning(f"LH API 페이지 {page_numbers[id(page)]} 조회 실패 (tp_code={tp_code}): {e}")
+                return []
+
+        if ordered:
+            for page in pages:
+                await asyncio.wait([page])
+                for future in _page_result(page):
+                    yield await future
+        else:
+            pending = set(pages)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    if id(future) in page_numbers:
+                        pending.update(_page_result(future))
+                    else:
+                        yield future.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def fetch_all_lh_notices(
+    tp_code: str = '13',
+    cnp_code: str = '28',
+    status: str = '공고중',
+    lookback_days: int = 0,
+    keyword: str = '',
+    client: httpx.AsyncClient | None = None,
+    with_supply: bool = True,
+    page_size: int = 100,
+) -> list[dict]:
+    """LH 공고를 전체 페이지 순회하여 모두 조회합니다 (fetch_all_ih_notices 대응).
+
+    1페이지 응답의 ALL_CNT로 전체 페이지 수를 계산하고, 나머지 페이지는
+    _PAGE_CONCURRENCY 이내로 병렬 조회합니다. 페이지 경계에서 생길 수 있는
+    중복은 PAN_ID 기준으로 제거합니다. 나머지 인자는 fetch_lh_notices()와 동일합니다.
+    결과는 페이지·목록 순서이며, iter_lh_notices(ordered=True)를 모두 모은 것과 같습니다.
+    한 페이지라도 조회에 실패하면 예외를 올립니다 — 일부 페이지가 빠진 목록을
+    전체 목록으로 쓰면 배치가 빠진 공고를 마감 처리하기 때문입니다.
+    """
+    return [n async for n in iter_lh_notices(
+        tp_code=tp_code, cnp_code=cnp_code, status=status, lookback_days=lookback_days,
+        keyword=keyword, client=client, with_supply=with_supply, page_size=page_size,
+        ordered=True, strict=True,
+    )]
 
 
 async def fetch_supply_detail(
@@ -234,6 +415,5 @@ async def fetch_supply_detail(
         "SPL_INF_TP_CD": spl_inf_tp_cd,
         "CCR_CNNT_SYS_DS_CD": ccr_cnnt_sys_ds_cd,
     }
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        columns, details, error = await _fetch_supply(client, item, tp_code)
+    columns, details, error = await _fetch_supply(get_shared_client(SUPPLY_URL), item, tp_code)
     return {"supply_columns": columns, "supply_details": details, "supply_error": error}
@@ -0,0 +1,200 @@
+"""요청 제한 — 호스트별 토큰 버킷(속도)과 AIMD 리미터(동시성).
+
+- TokenBucket: 프로세스 전체에서 호스트별로 공유하는 초당 요청 수 제한.
+  LH/IH 배치가 동시에 실행되어도 같은 호스트로의 합산 속도가 설정값을 넘지 않습니다.
+- AdaptiveLimiter: 고정 Semaphore 대신 사용합니다. 정상 응답이 이어지면 동시 요청 수를
+  조금씩 늘리고, 429/5xx/timeout이 발생하면 절반으로 줄여 업스트림이 감당 가능한 수준을 따라갑니다.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+from config import HOST_RATE_LIMITS, DEFAULT_HOST_RATE_LIMIT
+
+logger = logging.getLogger(__name__)
+
+# 이름 → 리미터 (상태 조회용)
+LIMITERS: dict[str, "AdaptiveLimiter"] = {}
+
+
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 burst개까지 쌓이는 토큰 버킷 (대기 순서 FIFO)."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """토큰 1개를 소비합니다. 토큰이 없으면 채워질 때까지 대기."""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+_HOST_BUCKETS: dict[str, TokenBucket] = {}
+
+
+def get_host_bucket(host: str) -> TokenBucket:
+    """호스트별 공유 토큰 버킷 (config.HOST_RATE_LIMITS, 없으면 기본값)."""
+    bucket = _HOST_BUCKETS.get(host)
+    if bucket is None:
+        rate, burst = HOST_RATE_LIMITS.get(host, DEFAULT_HOST_RATE_LIMIT)
+        bucket = TokenBucket(rate, burst)
+        _HOST_BUCKETS[host] = bucket
+    return bucket
+
+
+async def throttle(url: str) -> None:
+    """URL host의 토큰 버킷에서 토큰 1개를 얻을 때까지 대기합니다."""
+    host = urlparse(url).netloc
+    if host:
+        await get_host_bucket(host).acquire()
+
+
+class AdaptiveLimiter:
+    """AIMD(additive increase / multiplicative decrease) 동시성 제한기.
+
+    - 증가: 응답 지연이 latency_target 이하인 성공마다 limit += 1/limit (왕복 1회당 약 +1)
+    - 감소: 과부하 신호(429/5xx/timeout) 시 limit *= decrease_factor
+            동시에 실패한 요청들이 연쇄 감소시키지 않도록 cooldown 동안 1회만 적용
+    - limit 변경 이력은 history에 (시각, limit, 사유)로 남습니다.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int = 20,
+        latency_target: float = 5.0,
+        decrease_factor: float = 0.5,
+        cooldown: float = 2.0,
+        history_size: int = 100,
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.history: deque[tuple[float, int, str]] = deque(maxlen=history_size)
+        self.successes = 0
+        self.overloads = 0
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self.history.append((time.time(), self.limit, "초기값"))
+        LIMITERS[name] = self
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    # ------------------------------------------------------------------
+    # 슬롯 획득/반납
+    # ------------------------------------------------------------------
+    async def acquire(self) -> None:
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # 슬롯을 받은 직후 취소됨 → 반납
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(fut)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self._in_flight += 1
+                fut.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self):
+        """슬롯을 점유하고, 예외 없이 끝나면 소요 시간을 성공 신호로 기록합니다."""
+        await self.acquire()
+        start = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.release()
+            if ok:
+                self.record_success(time.monotonic() - start)
+
+    # ------------------------------------------------------------------
+    # 신호 기록
+    # ------------------------------------------------------------------
+    def record_success(self, latency: float) -> None:
+        self.successes += 1
+        if latency > self.latency_target or self._limit >= self.max_limit:
+            return
+        before = self.limit
+        self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+        if self.limit != before:
+            self.history.append((time.time(), self.limit, "증가"))
+            logger.debug(f"[{self.name}] 동시성 {before} → {self.limit}")
+            self._wake()
+
+    def record_overload(self, reason: str) -> None:
+        self.overloads += 1
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        before = self.limit
+        self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+        if self.limit != before:
+            self.history.append((time.time(), self.limit, f"감소 ({reason})"))
+            logger.info(f"[{self.name}] 과부하 감지 ({reason}) — 동시성 {before} → {self.limit}")
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "waiting": len(self._waiters),
+            "successes": self.successes,
+            "overloads": self.overloads,
+            "history": list(self.history),
+        }
+
+
+def limiter_stats() -> list[dict]:
+    """등록된 모든 리미터의 현재 상태와 변경 이력을 반환합니다."""
+    return [limiter.stats() for limiter in LIMITERS.values()]
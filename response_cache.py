@@ -0,0 +1,198 @@
+"""data.go.kr 응답 디스크 캐시 — SQLite 기반 TTL + LRU.
+
+MCP 서버 재시작이나 반복 배치 실행 시 같은 조회를 API 호출 없이 응답합니다.
+캐시 키는 URL + 정렬된 파라미터 (ServiceKey 제외)로 만들며,
+TTL은 호출부에서 엔드포인트별로 지정합니다 (목록/공급정보 분리).
+캐시 오류는 조회 실패로 이어지지 않도록 경고 로그 후 miss로 처리합니다.
+정상 결과 코드의 응답만 저장하며 (오류 응답은 TTL 동안 고착되지 않도록 제외),
+SQLite 호출은 이벤트 루프를 막지 않도록 스레드에서 실행합니다.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import httpx
+
+from config import RESPONSE_CACHE_PATH, RESPONSE_CACHE_MAX_ENTRIES
+from http_utils import request_with_retry, singleflight
+from rate_limit import AdaptiveLimiter
+
+logger = logging.getLogger(__name__)
+
+# 캐시 키에서 제외할 파라미터 (소문자 비교 — LH는 ServiceKey, IH는 serviceKey)
+_EXCLUDED_PARAMS = {"servicekey"}
+
+# data.go.kr 공통 오류 응답(XML을 JSON으로 변환한 형태)의 최상위 키
+_ERROR_ENVELOPE_KEYS = {"OpenAPI_ServiceResponse", "cmmMsgHeader"}
+
+
+def cache_key(url: str, params: dict | None) -> str:
+    """URL + 정규화된 파라미터로 캐시 키를 생성합니다 (ServiceKey 제외)."""
+    normalized = sorted(
+        (str(k), str(v)) for k, v in (params or {}).items()
+        if str(k).lower() not in _EXCLUDED_PARAMS
+    )
+    raw = json.dumps([url, normalized], ensure_ascii=False)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _is_cacheable(data) -> bool:
+    """정상 결과 코드의 응답인지 확인합니다. 오류 응답은 캐시하지 않습니다.
+
+    - data.go.kr 표준: header.resultCode가 "00"이 아니면 오류 (response.header 포함)
+    - 공통 오류 응답: OpenAPI_ServiceResponse/cmmMsgHeader (SERVICE_KEY_IS_NOT_REGISTERED 등)
+    - LH 응답 목록: resHeader의 SS_CODE가 "Y"가 아니면 오류
+    """
+    if isinstance(data, list):
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            for header in item.get("resHeader") or []:
+                if isinstance(header, dict) and header.get("SS_CODE", "Y") != "Y":
+                    return False
+        return True
+    if not isinstance(data, dict):
+        return False
+    if _ERROR_ENVELOPE_KEYS & data.keys():
+        return False
+    header = data.get("header")
+    if header is None and isinstance(data.get("response"), dict):
+        header = data["response"].get("header")
+    if isinstance(header, dict) and "resultCode" in header:
+        return str(header["resultCode"]) == "00"
+    return True
+
+
+class ResponseCache:
+    """JSON 응답을 저장하는 SQLite 캐시 (TTL 만료 + 최근 접근 기준 LRU 제거)."""
+
+    def __init__(self, path: str, max_entries: int = 5000):
+        self._path = path
+        self._max_entries = max_entries
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, url TEXT NOT NULL, body TEXT NOT NULL,"
+                " stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str, ttl: float):
+        """TTL 이내에 저장된 응답을 반환합니다. 없거나 만료되었으면 None."""
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT body, stored_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                body, stored_at = row
+                if now - stored_at > ttl:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    conn.commit()
+                    return None
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+            return json.loads(body)
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"응답 캐시 조회 실패: {e}")
+            return None
+
+    def set(self, key: str, url: str, data) -> None:
+        """응답을 저장하고, 최대 건수를 넘으면 가장 오래 접근하지 않은 항목부터 제거합니다."""
+        now = time.time()
+        try:
+            body = json.dumps(data, ensure_ascii=False)
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, url, body, stored_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, url, body, now, now),
+                )
+                (count,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+                if count > self._max_entries:
+                    conn.execute(
+                        "DELETE FROM responses WHERE key IN ("
+                        " SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                        (count - self._max_entries,),
+                    )
+                conn.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"응답 캐시 저장 실패: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_response_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache | None:
+    """프로세스 공유 캐시 지연 초기화. RESPONSE_CACHE_PATH가 비어있으면 None."""
+    global _response_cache
+    if _response_cache is None and RESPONSE_CACHE_PATH:
+        _response_cache = ResponseCache(RESPONSE_CACHE_PATH, RESPONSE_CACHE_MAX_ENTRIES)
+    return _response_cache
+
+
+async def cached_get_json(
+    client: httpx.AsyncClient,
+    url: str,
+    params: dict,
+    ttl: float,
+    limiter: AdaptiveLimiter | None = None,
+):
+    """GET 요청의 JSON 응답을 캐시 우선으로 반환합니다.
+
+    캐시 miss 시 동일 요청이 진행 중이면 그 결과를 공유하고 (singleflight),
+    아니면 request_with_retry()로 조회한 뒤 정상 결과 코드인 응답만 캐시에 저장합니다.
+    limiter: 실제 API 호출 구간에만 적용할 동시성 제한기 (응답 상태를 AIMD 신호로 전달).
+    ttl <= 0이면 캐시를 사용하지 않습니다.
+    """
+    cache = get_response_cache() if ttl > 0 else None
+    key = cache_key(url, params)
+
+    if cache is not None:
+        data = await asyncio.to_thread(cache.get, key, ttl)
+        if data is not None:
+            return data
+
+    async def _fetch():
+        if limiter is not None:
+            async with limiter.slot():
+                resp = await request_with_retry(client, "GET", url, limiter=limiter, params=params)
+        else:
+            resp = await request_with_retry(client, "GET", url, params=params)
+        data = resp.json()
+        if cache is not None and _is_cacheable(data):
+            await asyncio.to_thread(cache.set, key, url, data)
+        return data
+
+    # 첫 호출자의 클라이언트로 요청하므로 같은 클라이언트를 쓰는 호출자끼리만 공유
+    return await singleflight(("GET", url, key, id(client)), _fetch)
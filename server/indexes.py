@@ -0,0 +1,167 @@
+"""스냅샷 공고 인덱스 — 도구 질의를 업스트림 재조회·문자열 재파싱 없이 처리."""
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+# 검색어 토큰: "큰따옴표 구문" 또는 공백 없는 단어
+_QUERY_TOKEN = re.compile(r'"([^"]+)"|(\S+)')
+_WHITESPACE = re.compile(r"\s+")
+
+
+def parse_notice_date(value: str) -> date | None:
+    """공고 날짜 문자열(YYYY.MM.DD / YYYY-MM-DD / YYYYMMDD)을 date로 변환. 실패 시 None."""
+    digits = "".join(ch for ch in (value or "")[:10] if ch.isdigit())
+    if len(digits) != 8:
+        return None
+    try:
+        return datetime.strptime(digits, "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+class DeadlineIndex:
+    """LH 공고 마감일(CLSG_DT) 정렬 인덱스.
+
+    마감일은 적재 시 1회만 파싱하여 ordinal 정렬 리스트로 유지하고,
+    "N일 이내 마감" 같은 날짜 범위 질의는 bisect 슬라이스로 처리합니다.
+    마감일이 없거나 파싱할 수 없는 공고는 색인하지 않습니다.
+    증분 삽입 없이 스냅샷 갱신(또는 실시간 조회)마다 공고 목록 전체로 새로 만듭니다.
+    """
+
+    def __init__(self, notices: list[dict] = ()):
+        entries = []
+        for n in notices:
+            d = parse_notice_date(n.get("CLSG_DT", ""))
+            if d is not None:
+                entries.append((d.toordinal(), n))
+        entries.sort(key=lambda e: e[0])
+        self._keys: list[int] = [k for k, _ in entries]
+        self._notices: list[dict] = [n for _, n in entries]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def between(self, start: date, end: date) -> list[tuple[date, dict]]:
+        """마감일이 start~end(양끝 포함)인 공고를 마감일 오름차순으로 반환."""
+        lo = bisect_left(self._keys, start.toordinal())
+        hi = bisect_right(self._keys, end.toordinal())
+        return [(date.fromordinal(k), n) for k, n in zip(self._keys[lo:hi], self._notices[lo:hi])]
+
+    def due_within(self, days: int, past_days: int = 0, today: date | None = None) -> list[tuple[date, dict]]:
+        """오늘 기준 past_days일 전 ~ days일 후 사이에 마감되는 공고."""
+        today = today or date.today()
+        return self.between(today - timedelta(days=past_days), today + timedelta(days=days))
+
+
+# ---------------------------------------------------------------------------
+# 키워드 검색 (문자 n-gram 역색인)
+# ---------------------------------------------------------------------------
+def normalize_text(text: str) -> str:
+    """검색용 정규화: NFC(한글 자모 조합 통일) + 공백 축약 + 소문자."""
+    text = unicodedata.normalize("NFC", text or "")
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+def parse_query(query: str) -> list[list[str]]:
+    """검색어를 OR 그룹 목록으로 분해합니다. 그룹 안의 단어는 AND.
+
+    예) '신혼 청년 | 행복주택' → [['신혼', '청년'], ['행복주택']]
+        '"국민 임대" OR 매입' → [['국민 임대'], ['매입']]
+    """
+    groups: list[list[str]] = [[]]
+    for m in _QUERY_TOKEN.finditer(query or ""):
+        phrase, word = m.groups()
+        if word in ("|", "OR"):
+            groups.append([])
+            continue
+        term = normalize_text(phrase if phrase is not None else word)
+        if term:
+            groups[-1].append(term)
+    return [g for g in groups if g]
+
+
+def _grams(text: str, n: int) -> set[str]:
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class NgramIndex:
+    """공고 제목(+선택적 본문)의 문자 1~3-gram 역색인.
+
+    한글은 형태소 분리 없이도 부분 문자열 검색이 되도록 문자 n-gram을 사용합니다.
+    질의 단어의 n-gram 교집합으로 후보를 좁힌 뒤 실제 포함 여부를 확인하므로
+    결과는 정규화된 문자열의 부분 문자열 검색과 같습니다.
+    점수: 제목 출현 횟수 × 2 + 본문 출현 횟수 (단어 길이 가중), 제목이 단어로 시작하면 가산.
+    """
+
+    _MAX_N = 3
+
+    def __init__(self):
+        self._postings: dict[str, set[int]] = defaultdict(set)
+        self._docs: list[tuple[str, str, object]] = []
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, payload, title: str, body: str = "") -> int:
+        """문서 1건을 색인하고 문서 번호를 반환."""
+        doc_id = len(self._docs)
+        title_n, body_n = normalize_text(title), normalize_text(body)
+        self._docs.append((title_n, body_n, payload))
+        for text in (title_n, body_n):
+            for n in range(1, self._MAX_N + 1):
+                for gram in _grams(text, n):
+                    self._postings[gram].add(doc_id)
+        return doc_id
+
+    def _match(self, term: str) -> set[int]:
+        n = min(len(term), self._MAX_N)
+        candidates: set[int] | None = None
+        for gram in sorted(_grams(term, n), key=lambda g: len(self._postings.get(g, ()))):
+            posting = self._postings.get(gram)
+            if not posting:
+                return set()
+            candidates = set(posting) if candidates is None else candidates & posting
+            if not candidates:
+                return set()
+        return {
+            d for d in candidates or ()
+            if term in self._docs[d][0] or term in self._docs[d][1]
+        }
+
+    def _score(self, doc_id: int, terms: list[str]) -> float:
+        title, body, _ = self._docs[doc_id]
+        score = 0.0
+        for term in terms:
+            score += (title.count(term) * 2 + body.count(term)) * len(term)
+            if title.startswith(term):
+                score += len(term)
+        return score
+
+    def search(self, query: str, limit: int | None = None) -> list:
+        """질의에 맞는 payload를 점수 내림차순(동점은 색인 순서)으로 반환."""
+        scores: dict[int, float] = {}
+        for terms in parse_query(query):
+            matched: set[int] | None = None
+            for term in terms:
+                docs = self._match(term)
+                matched = docs if matched is None else matched & docs
+                if not matched:
+                    break
+            for d in matched or ():
+                scores[d] = max(scores.get(d, 0.0), self._score(d, terms))
+        ranked = sorted(scores, key=lambda d: (-scores[d], d))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self._docs[d][2] for d in ranked]
+
+
+def build_search_index(lh_notices: list[dict], ih_notices: list[dict]) -> NgramIndex:
+    """LH(PAN_NM)·IH(sj) 공고 제목과 스크래핑 본문(html_text, 있으면)을 ("lh"|"ih", notice)로 색인."""
+    index = NgramIndex()
+    for n in lh_notices:
+        index.add(("lh", n), n.get("PAN_NM", ""), n.get("html_text", ""))
+    for n in ih_notices:
+        index.add(("ih", n), n.get("sj", ""), n.get("html_text", ""))
+    return index
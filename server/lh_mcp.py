@@ -4,18 +4,42 @@
 """
 import asyncio
 import logging
-from datetime import datetime, timedelta
+from contextlib import aclosing, asynccontextmanager
+from datetime import date, datetime, timedelta
 
 from fastmcp import FastMCP
-from config import validate_env, LH_TP_CODES, TARGET_REGION, NATIONWIDE_AIS_CODES, EXCLUDE_SUBREGIONS
-from lh_api import fetch_lh_notices, fetch_supply_detail, dedup_by_pan_id, filter_region_relevant, exclude_subregions
-from ih_api import fetch_all_ih_notices
+from config import (
+    validate_env, LH_TP_CODES, TARGET_REGION, NATIONWIDE_AIS_CODES, EXCLUDE_SUBREGIONS,
+    SNAPSHOT_REFRESH_SECONDS, SNAPSHOT_LOOKBACK_DAYS,
+)
+from lh_api import (
+    fetch_lh_notices, fetch_all_lh_notices, fetch_supply_detail, enrich_supply,
+    dedup_by_pan_id, filter_region_relevant, exclude_subregions,
+)
+from ih_api import fetch_all_ih_notices, iter_ih_notices
+from http_utils import aclose_shared_clients
+from supply_store import GROUP_FIELDS, NUMPY_AVAILABLE, SupplyStore, format_supply_group, format_won
+from .indexes import DeadlineIndex, build_search_index, parse_query
+from .snapshot import NoticeSnapshot, SnapshotStore
 
 validate_env(["OPEN_API_KEY"])
 
 logger = logging.getLogger(__name__)
 
-mcp = FastMCP("LH_Incheon_Notice_Server")
+
+@asynccontextmanager
+async def _lifespan(server):
+    """서버 수명 동안 스냅샷 백그라운드 갱신과 공유 HTTP 클라이언트(keep-alive 연결)를 유지."""
+    if SNAPSHOT_REFRESH_SECONDS > 0:
+        _SNAPSHOTS.start()
+    try:
+        yield
+    finally:
+        await _SNAPSHOTS.stop()
+        await aclose_shared_clients()
+
+
+mcp = FastMCP("LH_Incheon_Notice_Server", lifespan=_lifespan)
 
 
 # ---------------------------------------------------------------------------
@@ -32,15 +56,17 @@ async def _gather_lh_notices(days: int, tp_codes: list[str] | None = None, **kwa
 
     LH API는 날짜 파라미터가 있으면 활성 공고(공고중/접수중)가 제외되므로,
     활성(lookback_days=0)과 과거(lookback_days=days) 2회 조회 후 병합한다.
-    tp_codes가 주어지면 각 tp_code별로 조회 후 병합.
+    tp_codes가 주어지면 각 tp_code별로 조회 후 병합. 각 조회는 전체 페이지를 순회한다.
     하나라도 성공하면 결과 반환, 모두 실패하면 첫 예외를 raise.
+    공급정보는 조회하지 않으며, 필요하면 호출부에서 enrich_supply()로 채운다.
 
     Returns:
         tuple[list[dict], list[str]]: (공고 목록, 부분 실패 경고 메시지 리스트)
     """
-    # status/lookback_days는 내부에서 제어 — kwargs 충돌 방지
+    # status/lookback_days/with_supply는 내부에서 제어 — kwargs 충돌 방지
     kwargs.pop("status", None)
     kwargs.pop("lookback_days", None)
+    kwargs.pop("with_supply", None)
 
     if tp_codes is not None:
         codes = tp_codes
@@ -53,9 +79,9 @@ async def _gather_lh_notices(days: int, tp_codes: list[str] | None = None, **kwa
         kw = {**kwargs}
         if code is not None:
             kw["tp_code"] = code
-        tasks.append(fetch_lh_notices(status="", lookback_days=0, **kw))
+        tasks.append(fetch_all_lh_notices(status="", lookback_days=0, with_supply=False, **kw))
         if days > 0:
-            tasks.append(fetch_lh_notices(status="", lookback_days=days, **kw))
+            tasks.append(fetch_all_lh_notices(status="", lookback_days=days, with_supply=False, **kw))
 
     results = await asyncio.gather(*tasks, return_exceptions=True)
 
@@ -77,10 +103,13 @@ async def _gather_lh_notices(days: int, tp_codes: list[str] | None = None, **kwa
     return merged, warnings
 
 
-async def _gather_all_lh_notices(days: int, tp_codes: list[str], **kwargs) -> tuple[list[dict], list[str]]:
+async def _gather_all_lh_notices(
+    days: int, tp_codes: list[str], with_supply: bool = True, **kwargs,
+) -> tuple[list[dict], list[str]]:
     """인천 지역(CNP_CD=28) + 전국 대상 LH 공고를 병합 반환.
 
     전국 조회 결과는 filter_region_relevant()로 인천 관련 + 전국 대상만 필터.
+    공급정보는 필터·중복 제거 후 남은 공고에 대해서만 조회한다 (with_supply=False면 생략).
 
     Returns:
         tuple[list[dict], list[str]]: (공고 목록, 부분 실패 경고 메시지 리스트)
@@ -122,9 +151,70 @@ async def _gather_all_lh_notices(days: int, tp_codes: list[str], **kwargs) -> tu
     if not merged and first_error:
         raise first_error
 
+    if with_supply:
+        await enrich_supply(merged)
+
     return merged, warnings
 
 
+# ---------------------------------------------------------------------------
+# 공고 스냅샷 (도구 응답용 메모리 캐시)
+# ---------------------------------------------------------------------------
+async def _load_snapshot(previous: NoticeSnapshot | None) -> dict:
+    """LH 활성(공급정보 포함) + 과거 lookback, IH lookback 공고를 조회하여 스냅샷 필드를 반환.
+
+    LH/IH 중 한쪽 조회가 실패하면 이전 스냅샷 값을 유지하고, 둘 다 실패하면 raise.
+    """
+    days = SNAPSHOT_LOOKBACK_DAYS
+    start_date, end_date = _date_range(days)
+    active_r, history_r, ih_r = await asyncio.gather(
+        _gather_all_lh_notices(0, LH_TP_CODES),
+        _gather_all_lh_notices(days, LH_TP_CODES, with_supply=False),
+        fetch_all_ih_notices(startCrtrYmd=start_date, endCrtrYmd=end_date),
+        return_exceptions=True,
+    )
+
+    data: dict = {}
+    lh_error = next((r for r in (active_r, history_r) if isinstance(r, Exception)), None)
+    if lh_error is None:
+        active, active_warnings = active_r
+        history, history_warnings = history_r
+        data["lh_notices"] = dedup_by_pan_id(active, history)
+        data["lh_active_ids"] = {n["PAN_ID"] for n in active}
+        data["lh_warnings"] = active_warnings + history_warnings
+    elif previous is not None and previous.lh_notices is not None:
+        data["lh_notices"] = previous.lh_notices
+        data["lh_active_ids"] = previous.lh_active_ids
+        data["lh_warnings"] = [f"LH 갱신 실패, v{previous.version} 데이터 사용: {lh_error}"]
+    else:
+        data["lh_error"] = str(lh_error)
+
+    if not isinstance(ih_r, Exception):
+        data["ih_notices"] = ih_r
+    elif previous is not None and previous.ih_notices is not None:
+        data["ih_notices"] = previous.ih_notices
+    else:
+        data["ih_error"] = str(ih_r)
+
+    if "lh_error" in data and "ih_error" in data:
+        raise RuntimeError(f"LH/IH 조회 모두 실패: {data['lh_error']}; {data['ih_error']}")
+    return data
+
+
+_SNAPSHOTS = SnapshotStore(_load_snapshot, SNAPSHOT_REFRESH_SECONDS, SNAPSHOT_LOOKBACK_DAYS)
+
+
+async def _get_snapshot(days: int) -> NoticeSnapshot | None:
+    """days가 스냅샷 범위 이내면 스냅샷을 반환. 비활성·범위 밖·로드 실패 시 None (실시간 조회)."""
+    if SNAPSHOT_REFRESH_SECONDS <= 0 or not 0 <= days <= SNAPSHOT_LOOKBACK_DAYS:
+        return None
+    try:
+        return await _SNAPSHOTS.get()
+    except Exception as e:
+        logger.warning(f"스냅샷 사용 불가 — 실시간 조회: {e}")
+        return None
+
+
 def _format_lh_notice_header(notice: dict) -> list[str]:
     """LH 공고 1건의 헤더 라인을 생성."""
     pan_ss = notice.get("PAN_SS", "")
@@ -248,6 +338,7 @@ async def get_ih_notices(
     end_date: str = "",
     keyword: str = "",
     category: str = "",
+    limit: int = 0,
 ) -> str:
     """
     인천도시공사(IH) 분양/임대 공고문을 조회합니다. 전체 페이지를 자동 순회합니다.
@@ -257,6 +348,7 @@ async def get_ih_notices(
         end_date: 조회 종료일 (YYYY-MM-DD, 기본값 오늘)
         keyword: 공고 제목 필터 키워드
         category: 공고 구분 (분양/임대, 빈문자열이면 전체)
+        limit: 최대 반환 건수 (0이면 전체). 지정 시 N건을 채우면 남은 페이지는 조회하지 않음
     """
     if not start_date or not end_date:
         default_start, default_end = _date_range(365)
@@ -264,12 +356,18 @@ async def get_ih_notices(
         end_date = end_date or default_end
 
     try:
-        notices = await fetch_all_ih_notices(
+        notices = []
+        async with aclosing(iter_ih_notices(
             startCrtrYmd=start_date,
             endCrtrYmd=end_date,
             sj=keyword,
             seNm=category,
-        )
+            ordered=True,
+        )) as stream:
+            async for notice in stream:
+                notices.append(notice)
+                if limit > 0 and len(notices) >= limit:
+                    break
     except Exception as e:
         return f"오류: {e}"
 
@@ -305,12 +403,17 @@ async def get_notice_summary(
     Args:
         days: 조회 기간 (기본값 30일)
     """
-    start_date, end_date = _date_range(days)
+    snapshot = await _get_snapshot(days)
+    if snapshot is not None:
+        results = [snapshot.lh_result(days), snapshot.ih_result(days)]
+    else:
+        start_date, end_date = _date_range(days)
 
-    lh_task = _gather_all_lh_notices(days, LH_TP_CODES)
-    ih_task = fetch_all_ih_notices(startCrtrYmd=start_date, endCrtrYmd=end_date)
+        # 상태별 건수만 집계하므로 공급정보 조회 생략
+        lh_task = _gather_all_lh_notices(days, LH_TP_CODES, with_supply=False)
+        ih_task = fetch_all_ih_notices(startCrtrYmd=start_date, endCrtrYmd=end_date)
 
-    results = await asyncio.gather(lh_task, ih_task, return_exceptions=True)
+        results = await asyncio.gather(lh_task, ih_task, return_exceptions=True)
     lines = [f"## 최근 {days}일 공고 현황\n"]
     lh_warnings = []
 
@@ -365,7 +468,8 @@ async def search_all_notices(
     LH + IH 통합 키워드 검색을 수행합니다.
 
     Args:
-        keyword: 검색 키워드 (필수)
+        keyword: 검색 키워드 (필수). 공백으로 구분한 단어는 AND, `|` 또는 OR로 묶으면 OR,
+                 큰따옴표로 감싸면 구문 검색 (예: `신혼 청년 | "행복 주택"`). 결과는 관련도순.
         days: 조회 기간 (기본값 365일)
         category: IH 공고 구분 필터 (분양/임대, 빈문자열이면 전체)
     """
@@ -373,14 +477,46 @@ async def search_all_notices(
         return "오류: 검색 키워드를 입력해주세요."
 
     keyword = keyword.strip()
-    start_date, end_date = _date_range(days)
+    terms = parse_query(keyword)
+    if not terms:
+        return "오류: 검색 키워드를 입력해주세요."
 
-    lh_task = _gather_all_lh_notices(days, LH_TP_CODES, keyword=keyword)
-    ih_task = fetch_all_ih_notices(
-        startCrtrYmd=start_date, endCrtrYmd=end_date, sj=keyword, seNm=category,
-    )
+    snapshot = await _get_snapshot(days)
+    if snapshot is not None:
+        lh_r, ih_r = snapshot.lh_result(days), snapshot.ih_result(days)
+        index = snapshot.search_index
+    else:
+        start_date, end_date = _date_range(days)
+        # 단일 단어(따옴표 구문 포함)만 업스트림 필터(LH PAN_NM, IH sj)를 사용하고, AND/OR 질의는 받은 목록을 로컬 색인으로 검색
+        # 원문 대신 파싱된 단어를 보내되, 업스트림 필터는 대소문자를 구분하므로 소문자화된 영문 단어는 로컬 색인에만 맡김
+        single_term = terms[0][0] if len(terms) == 1 and len(terms[0]) == 1 else ""
+        upstream_keyword = single_term if single_term == single_term.upper() else ""
+
+        lh_task = _gather_all_lh_notices(days, LH_TP_CODES, with_supply=False, keyword=upstream_keyword)
+        ih_task = fetch_all_ih_notices(
+            startCrtrYmd=start_date, endCrtrYmd=end_date, sj=upstream_keyword, seNm=category,
+        )
+
+        lh_r, ih_r = await asyncio.gather(lh_task, ih_task, return_exceptions=True)
+        index = build_search_index(
+            [] if isinstance(lh_r, Exception) else lh_r[0],
+            [] if isinstance(ih_r, Exception) else ih_r,
+        )
 
-    results = await asyncio.gather(lh_task, ih_task, return_exceptions=True)
+    hits = index.search(keyword)
+    if not isinstance(lh_r, Exception):
+        in_range = {id(n) for n in lh_r[0]}
+        lh_matches = [n for src, n in hits if src == "lh" and id(n) in in_range]
+        if snapshot is None:
+            await enrich_supply(lh_matches)
+        lh_r = (lh_matches, lh_r[1])
+    if not isinstance(ih_r, Exception):
+        in_range = {id(n) for n in ih_r}
+        ih_r = [
+            n for src, n in hits
+            if src == "ih" and id(n) in in_range and (not category or n.get("seNm") == category)
+        ]
+    results = [lh_r, ih_r]
     lines = [f"## '{keyword}' 통합 검색 결과\n"]
     lh_warnings = []
 
@@ -422,6 +558,7 @@ async def search_all_notices(
 @mcp.tool()
 async def get_upcoming_deadlines(
     days: int = 7,
+    past_days: int = 0,
 ) -> str:
     """
     마감 임박 LH 공고를 D-day 순으로 반환합니다. IH는 마감일 정보가 없어 LH만 대상입니다.
@@ -429,26 +566,25 @@ async def get_upcoming_deadlines(
 
     Args:
         days: 마감까지 남은 일수 (기본값 7일 이내)
+        past_days: 0보다 크면 최근 N일 이내에 이미 마감된 공고도 포함 (과거 공고 조회)
     """
+    snapshot = await _get_snapshot(past_days)
     try:
-        notices, warnings = await _gather_all_lh_notices(0, LH_TP_CODES)
+        if snapshot is not None:
+            if snapshot.lh_notices is None:
+                raise RuntimeError(snapshot.lh_error or "LH 스냅샷 없음")
+            index, warnings = snapshot.deadline_index, snapshot.lh_warnings
+        else:
+            notices, warnings = await _gather_all_lh_notices(past_days, LH_TP_CODES)
+            index = DeadlineIndex(notices)
     except Exception as e:
         return f"오류: {e}"
 
-    today = datetime.now()
-    upcoming = []
-    for n in notices:
-        clsg = n.get("CLSG_DT", "")
-        if not clsg:
-            continue
-        try:
-            deadline = datetime.strptime(clsg.replace("-", "."), "%Y.%m.%d")
-        except ValueError:
-            continue
-        d_day = (deadline - today).days
-        if 0 <= d_day <= days:
-            n["_d_day"] = d_day
-            upcoming.append(n)
+    today = date.today()
+    upcoming = index.due_within(days, past_days=past_days, today=today)
+    if snapshot is not None and past_days == 0:
+        # 스냅샷에는 과거 lookback 공고도 있으므로 실시간 조회와 같게 활성 공고로 제한
+        upcoming = [(d, n) for d, n in upcoming if n.get("PAN_ID") in snapshot.lh_active_ids]
 
     if not upcoming:
         msg = f"마감 {days}일 이내 LH 공고가 없습니다."
@@ -456,12 +592,10 @@ async def get_upcoming_deadlines(
             msg += f"\n\n⚠ LH 일부 조회 실패: {'; '.join(warnings)}"
         return msg
 
-    upcoming.sort(key=lambda x: x["_d_day"])
-
     lines = [f"## 마감 임박 LH 공고 ({len(upcoming)}건, D-{days}일 이내)\n"]
-    for n in upcoming:
-        d = n["_d_day"]
-        lines.append(f"**D-{d}일**")
+    for deadline, n in upcoming:
+        d = (deadline - today).days
+        lines.append(f"**D-{d}일**" if d >= 0 else f"**마감 {-d}일 경과**")
         lines.extend(_format_lh_notice_header(n))
         lines.append("")
 
@@ -473,6 +607,148 @@ async def get_upcoming_deadlines(
     return "\n".join(lines)
 
 
+@mcp.tool()
+async def search_supply(
+    max_deposit: float | None = None,
+    min_deposit: float | None = None,
+    max_rent: float | None = None,
+    min_area: float | None = None,
+    max_area: float | None = None,
+    min_units: int | None = None,
+    region: str = "",
+    ais_type: str = "",
+    house_type: str = "",
+    sort_by: str = "deposit",
+    descending: bool = False,
+    limit: int = 30,
+) -> str:
+    """
+    활성 LH 공고 전체의 공급정보(주택형별 행)를 보증금·임대료·면적 조건으로 검색합니다.
+    예) 보증금 3,000만원 이하 + 전용 40㎡ 이상 + 인천: max_deposit=3000, min_area=40, region="인천"
+    해당 값이 없는 공급 행은 그 조건이 지정되면 제외됩니다.
+
+    Args:
+        max_deposit: 임대보증금 상한 (만원)
+        min_deposit: 임대보증금 하한 (만원)
+        max_rent: 월임대료 상한 (만원)
+        min_area: 전용면적 하한 (㎡)
+        max_area: 전용면적 상한 (㎡)
+        min_units: 공급 세대수 하한
+        region: 지역명 포함 필터 (공고 CNP_CD_NM, 예: 인천)
+        ais_type: 공고 유형명 포함 필터 (AIS_TP_CD_NM, 예: 행복주택)
+        house_type: 주택형 포함 필터 (예: 59)
+        sort_by: 정렬 기준 (deposit, rent, area, units)
+        descending: True면 내림차순
+        limit: 최대 반환 행 수 (기본값 30)
+    """
+    if not NUMPY_AVAILABLE:
+        return "오류: numpy 미설치 — 공급정보 검색을 사용할 수 없습니다 (pip install numpy)."
+
+    snapshot = await _get_snapshot(0)
+    try:
+        if snapshot is not None:
+            if snapshot.lh_notices is None:
+                raise RuntimeError(snapshot.lh_error or "LH 스냅샷 없음")
+            store, warnings = snapshot.supply_store, snapshot.lh_warnings
+        else:
+            notices, warnings = await _gather_all_lh_notices(0, LH_TP_CODES)
+            store = SupplyStore(notices)
+    except Exception as e:
+        return f"오류: {e}"
+
+    def _won(manwon: float | None) -> float | None:
+        return None if manwon is None else manwon * 10_000
+
+    try:
+        total, rows = store.query(
+            sort_by=sort_by,
+            descending=descending,
+            limit=limit,
+            min_deposit=_won(min_deposit),
+            max_deposit=_won(max_deposit),
+            max_rent=_won(max_rent),
+            min_area=min_area,
+            max_area=max_area,
+            min_units=min_units,
+            region=region,
+            ais_type=ais_type,
+            house_type=house_type,
+        )
+    except ValueError as e:
+        return f"오류: {e}"
+
+    if not rows:
+        msg = f"조건에 맞는 공급정보가 없습니다 (검색 대상 {len(store)}행)."
+        if warnings:
+            msg += f"\n\n⚠ LH 일부 조회 실패: {'; '.join(warnings)}"
+        return msg
+
+    lines = [f"## 공급정보 검색 결과 ({total}행 중 {len(rows)}행, {sort_by} 기준 정렬)\n"]
+    for row in rows:
+        n = row["notice"]
+        area = "-" if row["area"] is None else f"{row['area']:g}㎡"
+        units = "-" if row["units"] is None else f"{row['units']:,.0f}세대"
+        lines.append(f"- [{n.get('AIS_TP_CD_NM', '')}] {n.get('PAN_NM', '')} (PAN_ID: {n.get('PAN_ID', '')})")
+        lines.append(
+            f"  - 주택형: {row['house_type'] or '-'} | 보증금: {format_won(row['deposit'])}"
+            f" | 월임대료: {format_won(row['rent'])} | 전용: {area} | {units}"
+            f" | 지역: {n.get('CNP_CD_NM', '')} | 상태: {n.get('PAN_SS', '')}"
+        )
+
+    if warnings:
+        lines.append(f"\n---\n⚠ LH 일부 조회 실패: {'; '.join(warnings)}")
+
+    return "\n".join(lines)
+
+
+@mcp.tool()
+async def get_supply_statistics(
+    group_by: str = "ais_type",
+    region: str = "",
+    ais_type: str = "",
+    status: str = "",
+) -> str:
+    """
+    활성 LH 공고 전체 공급정보의 가격 분포를 그룹별로 집계합니다.
+    보증금·월임대료의 최소/중앙값/P90, ㎡당 보증금·월임대료 중앙값, 주택형별 세대수를 반환합니다.
+
+    Args:
+        group_by: 그룹 기준 (ais_type=공고유형, region=지역, status=공고상태)
+        region: 지역명 포함 필터 (예: 인천)
+        ais_type: 공고 유형명 포함 필터 (예: 행복주택)
+        status: 공고 상태 포함 필터 (예: 접수중)
+    """
+    if not NUMPY_AVAILABLE:
+        return "오류: numpy 미설치 — 공급정보 통계를 사용할 수 없습니다 (pip install numpy)."
+    if group_by not in GROUP_FIELDS:
+        return f"오류: group_by는 {', '.join(GROUP_FIELDS)} 중 하나여야 합니다."
+
+    snapshot = await _get_snapshot(0)
+    try:
+        if snapshot is not None:
+            if snapshot.lh_notices is None:
+                raise RuntimeError(snapshot.lh_error or "LH 스냅샷 없음")
+            store, warnings = snapshot.supply_store, snapshot.lh_warnings
+        else:
+            notices, warnings = await _gather_all_lh_notices(0, LH_TP_CODES)
+            store = SupplyStore(notices)
+    except Exception as e:
+        return f"오류: {e}"
+
+    groups = store.summarize(group_by, mask=store.mask(region=region, ais_type=ais_type, status=status))
+    if not groups:
+        return "집계할 공급정보가 없습니다."
+
+    lines = [f"## LH 공급가격 분포 ({GROUP_FIELDS[group_by]}별, {sum(g['rows'] for g in groups)}행)\n"]
+    lines.extend(f"- {format_supply_group(g)}" for g in groups)
+    lines.append("\n*금액은 공급정보 라벨의 단위(천원/만원)를 원 단위로 환산한 값입니다.*")
+
+    if warnings:
+        lines.append(f"\n---\n⚠ LH 일부 조회 실패: {'; '.join(warnings)}")
+
+    return "\n".join(lines)
+
+
 @mcp.tool()
 async def get_supply_detail(
     pan_id: str,
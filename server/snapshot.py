@@ -0,0 +1,161 @@
+"""MCP 서버용 공고 스냅샷 — 백그라운드 갱신 + stale-while-revalidate.
+
+도구 호출마다 업스트림 API를 fan-out 하지 않고, 주기적으로 갱신되는
+메모리 스냅샷(LH 활성 + 과거 lookback, IH lookback)에서 응답합니다.
+- 스냅샷이 refresh_interval보다 오래되면 기존 스냅샷을 즉시 반환하고 백그라운드에서 갱신
+- 갱신 중 일부(LH/IH) 조회가 실패하면 해당 부분은 이전 스냅샷 값을 유지
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from supply_store import NUMPY_AVAILABLE, SupplyStore
+from .indexes import DeadlineIndex, NgramIndex, build_search_index, parse_notice_date
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class NoticeSnapshot:
+    """특정 시점의 LH/IH 공고 집합 (불변으로 취급 — 갱신 시 새 객체로 교체)."""
+
+    version: int
+    fetched_at: float
+    lookback_days: int
+    lh_notices: list[dict] | None = None  # 활성(공급정보 포함) + 과거 lookback 공고
+    lh_active_ids: set[str] = field(default_factory=set)
+    lh_warnings: list[str] = field(default_factory=list)
+    lh_error: str | None = None
+    ih_notices: list[dict] | None = None
+    ih_error: str | None = None
+    deadline_index: DeadlineIndex = field(init=False)
+    search_index: NgramIndex = field(init=False)
+    supply_store: SupplyStore | None = field(init=False)
+
+    def __post_init__(self):
+        # 적재 시 마감일을 1회 파싱해 정렬 인덱스 구성 (과거 lookback 공고 포함)
+        self.deadline_index = DeadlineIndex(self.lh_notices or [])
+        # 키워드 검색용 제목 n-gram 역색인
+        self.search_index = build_search_index(self.lh_notices or [], self.ih_notices or [])
+        # 공급정보 컬럼형 저장소 (공급정보는 활성 공고만 보유, numpy 없으면 None)
+        self.supply_store = SupplyStore(self.lh_notices or []) if NUMPY_AVAILABLE else None
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def lh_result(self, days: int) -> tuple[list[dict], list[str]] | Exception:
+        """활성 공고 + 최근 days일 이내 게시된 과거 공고. LH 조회 실패 상태면 예외 객체."""
+        if self.lh_notices is None:
+            return RuntimeError(self.lh_error or "LH 스냅샷 없음")
+        cutoff = date.today() - timedelta(days=days)
+        notices = [
+            n for n in self.lh_notices
+            if n.get("PAN_ID") in self.lh_active_ids
+            or (days > 0 and (parse_notice_date(n.get("PAN_NT_ST_DT") or n.get("PAN_DT", "")) or date.min) >= cutoff)
+        ]
+        return notices, list(self.lh_warnings)
+
+    def ih_result(self, days: int) -> list[dict] | Exception:
+        """최근 days일 이내 등록된 IH 공고. IH 조회 실패 상태면 예외 객체."""
+        if self.ih_notices is None:
+            return RuntimeError(self.ih_error or "IH 스냅샷 없음")
+        cutoff = date.today() - timedelta(days=days)
+        return [
+            n for n in self.ih_notices
+            if (parse_notice_date(n.get("crtYmd", "")) or date.min) >= cutoff
+        ]
+
+
+class SnapshotStore:
+    """NoticeSnapshot을 보관하고 주기적으로 갱신합니다.
+
+    loader: 이전 스냅샷(또는 None)을 받아 NoticeSnapshot 필드 dict를 반환하는 coroutine 함수
+            (version/fetched_at/lookback_days 제외)
+    """
+
+    def __init__(self, loader, refresh_interval: float, lookback_days: int):
+        self._loader = loader
+        self.refresh_interval = refresh_interval
+        self.lookback_days = lookback_days
+        self._snapshot: NoticeSnapshot | None = None
+        self._version = 0
+        self._refresh_task: asyncio.Task | None = None
+        self._background_task: asyncio.Task | None = None
+
+    @property
+    def current(self) -> NoticeSnapshot | None:
+        return self._snapshot
+
+    async def get(self) -> NoticeSnapshot:
+        """스냅샷 반환. 없으면 로드될 때까지 대기, 오래되었으면 기존 값 반환 + 백그라운드 갱신."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return await self.refresh()
+        if snapshot.age > self.refresh_interval:
+            self._ensure_refresh()
+        return snapshot
+
+    async def refresh(self) -> NoticeSnapshot:
+        """스냅샷을 갱신합니다. 이미 갱신 중이면 그 결과를 공유."""
+        return await asyncio.shield(self._ensure_refresh())
+
+    def _ensure_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._do_refresh())
+            self._refresh_task.add_done_callback(
+                lambda t: t.cancelled() or t.exception()  # 백그라운드 갱신 예외 경고 방지
+            )
+        return self._refresh_task
+
+    async def _do_refresh(self) -> NoticeSnapshot:
+        started = time.monotonic()
+        previous = self._snapshot
+        try:
+            data = await self._loader(previous)
+        except Exception as e:
+            if previous is None:
+                raise
+            logger.warning(f"스냅샷 갱신 실패 — 기존 v{previous.version} 유지: {e}")
+            return previous
+
+        self._version += 1
+        snapshot = NoticeSnapshot(
+            version=self._version,
+            fetched_at=time.time(),
+            lookback_days=self.lookback_days,
+            **data,
+        )
+        self._snapshot = snapshot
+        logger.info(
+            f"스냅샷 v{snapshot.version} 갱신 ({time.monotonic() - started:.1f}초): "
+            f"LH {len(snapshot.lh_notices or [])}건, IH {len(snapshot.ih_notices or [])}건"
+        )
+        return snapshot
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"스냅샷 초기 로드 실패: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        """백그라운드 주기 갱신 시작."""
+        if self._background_task is None:
+            self._background_task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """백그라운드 갱신 중지."""
+        for task in (self._background_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._background_task = None
+        self._refresh_task = None
@@ -0,0 +1,271 @@
+"""LH 공급정보 컬럼형 저장소 — 보증금/임대료/면적/세대수 조건 검색·분포 집계.
+
+공고별 supply_details(dsList01Nm 라벨을 키로 하는 느슨한 dict 목록)를
+숫자 배열(numpy) 컬럼으로 정규화하여, 전체 공고의 공급 행을 한 번의
+벡터 연산으로 필터·정렬합니다.
+- 금액은 원 단위, 면적은 ㎡ 단위로 저장 (라벨의 천원/만원 단위 표기를 환산)
+- 값이 없거나 숫자로 읽을 수 없는 칸은 NaN → 해당 조건이 걸리면 제외, 통계에서 제외
+- summarize(): 유형/지역/상태별 보증금·임대료 분포, ㎡당 비용, 주택형별 세대수 (그룹 단위 배열 연산)
+numpy가 없으면 NUMPY_AVAILABLE=False이며 SupplyStore 생성 시 RuntimeError.
+"""
+import logging
+import re
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+NUMPY_AVAILABLE = np is not None
+
+# 필드별 라벨 매칭 규칙: (포함해야 하는 문자열 후보, 제외 문자열) — 앞쪽 후보가 우선
+_FIELD_LABELS: dict[str, tuple[tuple[str, ...], tuple[str, ...]]] = {
+    "deposit": (("임대보증금", "보증금"), ("전환",)),
+    "rent": (("월임대료", "임대료", "월세"), ("전환",)),
+    "area": (("전용면적", "전용", "면적"), ("공용", "공급면적", "계약면적")),
+    "units": (("공급호수", "모집호수", "세대수", "호수", "세대"), ()),
+    "house_type": (("주택형", "형별", "타입", "평형"), ()),
+}
+NUMERIC_FIELDS = ("deposit", "rent", "area", "units")
+_SORT_FIELDS = NUMERIC_FIELDS
+GROUP_FIELDS = {"ais_type": "유형", "region": "지역", "status": "상태"}
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+_LABEL_SPACES = re.compile(r"\s+")
+
+
+def _label_scale(label: str) -> float:
+    """라벨에 표기된 금액 단위를 원 단위 배수로 변환."""
+    if "천원" in label:
+        return 1_000.0
+    if "만원" in label:
+        return 10_000.0
+    return 1.0
+
+
+def parse_number(value) -> float:
+    """'12,345,000원', '59.97㎡', '1,200~1,500' 같은 값에서 첫 숫자를 읽습니다 (없으면 NaN)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    m = _NUMBER.search(str(value or "").replace(",", ""))
+    return float(m.group()) if m else float("nan")
+
+
+def format_won(value: float | None) -> str:
+    """원 단위 금액을 만원 단위 문자열로 변환 (만원 미만은 원 단위)."""
+    if value is None:
+        return "-"
+    if abs(value) < 10_000:
+        return f"{value:,.0f}원"
+    return f"{value / 10_000:,.0f}만원"
+
+
+def detect_columns(supply_columns: dict, sample: dict | None = None) -> dict[str, tuple[str, float]]:
+    """supply_columns({필드키: 라벨})에서 표준 필드별 (필드키, 단위 배수)를 찾습니다.
+
+    supply_columns가 비어 있으면 sample 행의 키를 라벨로 사용합니다.
+    """
+    labels = supply_columns or {k: k for k in (sample or {})}
+    normalized = {key: _LABEL_SPACES.sub("", str(label)) for key, label in labels.items()}
+    found: dict[str, tuple[str, float]] = {}
+    for name, (candidates, excludes) in _FIELD_LABELS.items():
+        for candidate in candidates:
+            key = next(
+                (k for k, label in normalized.items()
+                 if candidate in label and not any(x in label for x in excludes)
+                 and k not in {v[0] for v in found.values()}),
+                None,
+            )
+            if key is not None:
+                found[name] = (key, _label_scale(normalized[key]))
+                break
+    return found
+
+
+class SupplyStore:
+    """공급 행 단위 컬럼형 저장소.
+
+    행 컬럼: deposit/rent(원), area(㎡), units(세대), house_type(문자열), notice(공고 인덱스)
+    공고 컬럼(region/ais_type/status)은 코드 배열 + 라벨 목록으로 보관하여 그룹 연산에 사용합니다.
+    """
+
+    def __init__(self, notices: list[dict]):
+        if np is None:
+            raise RuntimeError("numpy 미설치 — 공급정보 검색 불가")
+        self.notices = notices
+        numeric: dict[str, list[float]] = {f: [] for f in NUMERIC_FIELDS}
+        house_types: list[str] = []
+        notice_idx: list[int] = []
+        for i, n in enumerate(notices):
+            details = n.get("supply_details") or []
+            if not details:
+                continue
+            cols = detect_columns(n.get("supply_columns") or {}, details[0])
+            for d in details:
+                for f in NUMERIC_FIELDS:
+                    key, scale = cols.get(f, (None, 1.0))
+                    numeric[f].append(parse_number(d.get(key)) * scale if key else float("nan"))
+                key = cols.get("house_type", (None,))[0]
+                house_types.append(str(d.get(key) or "").strip() if key else "")
+                notice_idx.append(i)
+
+        self.deposit = np.asarray(numeric["deposit"], dtype=np.float64)
+        self.rent = np.asarray(numeric["rent"], dtype=np.float64)
+        self.area = np.asarray(numeric["area"], dtype=np.float64)
+        self.units = np.asarray(numeric["units"], dtype=np.float64)
+        self.house_type = np.asarray(house_types, dtype=object)
+        self.notice = np.asarray(notice_idx, dtype=np.int32)
+
+        # 공고 단위 범주 컬럼 → 행 단위 코드 배열
+        self.labels: dict[str, list[str]] = {}
+        self.codes: dict[str, "np.ndarray"] = {}
+        for name, key in (("region", "CNP_CD_NM"), ("ais_type", "AIS_TP_CD_NM"), ("status", "PAN_SS")):
+            values = [str(n.get(key) or "") for n in notices]
+            labels = sorted(set(values))
+            lookup = {v: c for c, v in enumerate(labels)}
+            per_notice = np.asarray([lookup[v] for v in values], dtype=np.int32)
+            self.labels[name] = labels
+            self.codes[name] = per_notice[self.notice] if len(self.notice) else np.zeros(0, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.notice)
+
+    def column(self, name: str):
+        return getattr(self, name)
+
+    def _category_mask(self, name: str, text: str):
+        """라벨에 text가 포함된 범주의 행 mask."""
+        matched = [c for c, label in enumerate(self.labels[name]) if text in label]
+        return np.isin(self.codes[name], matched)
+
+    def mask(
+        self,
+        min_deposit: float | None = None,
+        max_deposit: float | None = None,
+        min_rent: float | None = None,
+        max_rent: float | None = None,
+        min_area: float | None = None,
+        max_area: float | None = None,
+        min_units: float | None = None,
+        region: str = "",
+        ais_type: str = "",
+        status: str = "",
+        house_type: str = "",
+    ):
+        """조건을 모두 만족하는 행의 bool 배열 (금액은 원 단위)."""
+        m = np.ones(len(self), dtype=bool)
+        for column, low, high in (
+            (self.deposit, min_deposit, max_deposit),
+            (self.rent, min_rent, max_rent),
+            (self.area, min_area, max_area),
+            (self.units, min_units, None),
+        ):
+            # NaN 비교는 False → 값이 없는 행은 조건이 걸리면 제외
+            if low is not None:
+                m &= column >= low
+            if high is not None:
+                m &= column <= high
+        for name, text in (("region", region), ("ais_type", ais_type), ("status", status)):
+            if text:
+                m &= self._category_mask(name, text)
+        if house_type:
+            m &= np.fromiter((house_type in h for h in self.house_type), dtype=bool, count=len(self))
+        return m
+
+    def query(self, sort_by: str = "deposit", descending: bool = False, limit: int = 50, **conditions) -> tuple[int, list[dict]]:
+        """조건 검색 후 sort_by 기준 정렬하여 (전체 건수, 상위 limit행)을 반환.
+
+        각 행: {"notice": 공고 dict, "deposit", "rent", "area", "units", "house_type"} (NaN은 None)
+        """
+        if sort_by not in _SORT_FIELDS:
+            raise ValueError(f"정렬 기준은 {', '.join(_SORT_FIELDS)} 중 하나여야 합니다: {sort_by}")
+        rows = np.flatnonzero(self.mask(**conditions))
+        key = self.column(sort_by)[rows]
+        # NaN은 정렬 방향과 무관하게 뒤로
+        order = np.lexsort((-key if descending else key, np.isnan(key)))
+        rows = rows[order][:max(limit, 0)]
+        result = []
+        for r in rows:
+            row = {"notice": self.notices[self.notice[r]], "house_type": self.house_type[r]}
+            for f in NUMERIC_FIELDS:
+                v = float(self.column(f)[r])
+                row[f] = None if v != v else v
+            result.append(row)
+        return int(len(key)), result
+
+    def summarize(self, group_by: str = "ais_type", mask=None, top_house_types: int = 5) -> list[dict]:
+        """group_by(ais_type/region/status)별 공급 분포를 집계합니다 (행 수 내림차순).
+
+        각 그룹: {"group", "rows", "notices", "units",
+                  "deposit"/"rent"/"deposit_per_m2"/"rent_per_m2": {"min","median","p90"} 또는 None,
+                  "house_types": [(주택형, 세대수), ...] 세대수 상위 top_house_types개}
+        행을 그룹 코드로 한 번 정렬한 뒤 그룹 구간별로 배열 통계를 계산합니다.
+        """
+        if group_by not in GROUP_FIELDS:
+            raise ValueError(f"그룹 기준은 {', '.join(GROUP_FIELDS)} 중 하나여야 합니다: {group_by}")
+        rows = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        codes = self.codes[group_by][rows]
+        order = np.argsort(codes, kind="stable")
+        rows, codes = rows[order], codes[order]
+        groups, starts = np.unique(codes, return_index=True)
+        bounds = np.append(starts, len(rows))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            deposit_m2 = np.where(self.area > 0, self.deposit / self.area, np.nan)
+            rent_m2 = np.where(self.area > 0, self.rent / self.area, np.nan)
+        units = np.nan_to_num(self.units)
+
+        summary = []
+        for g, lo, hi in zip(groups, bounds[:-1], bounds[1:]):
+            idx = rows[lo:hi]
+            types, inverse = np.unique(self.house_type[idx], return_inverse=True)
+            per_type = np.bincount(inverse, weights=units[idx], minlength=len(types))
+            top = np.argsort(-per_type, kind="stable")[:top_house_types]
+            summary.append({
+                "group": self.labels[group_by][g] or "(미상)",
+                "rows": int(idx.size),
+                "notices": int(np.unique(self.notice[idx]).size),
+                "units": float(units[idx].sum()),
+                "deposit": _distribution(self.deposit[idx]),
+                "rent": _distribution(self.rent[idx]),
+                "deposit_per_m2": _distribution(deposit_m2[idx]),
+                "rent_per_m2": _distribution(rent_m2[idx]),
+                "house_types": [(str(types[i]) or "(미상)", float(per_type[i])) for i in top if per_type[i] > 0],
+            })
+        summary.sort(key=lambda s: -s["rows"])
+        return summary
+
+
+def _distribution(values) -> dict | None:
+    """NaN을 제외한 최소/중앙값/90백분위 (값이 없으면 None)."""
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return None
+    median, p90 = np.percentile(values, [50, 90])
+    return {"min": float(values.min()), "median": float(median), "p90": float(p90)}
+
+
+def format_supply_group(group: dict) -> str:
+    """summarize() 그룹 1건을 한 줄 요약으로 변환 (MCP 도구·배치 리포트 공용)."""
+    def _dist(name: str, d: dict | None) -> str:
+        if d is None:
+            return f"{name} -"
+        return f"{name} 최소 {format_won(d['min'])} / 중앙 {format_won(d['median'])} / P90 {format_won(d['p90'])}"
+
+    parts = [
+        f"{group['group']}: 공고 {group['notices']}건 · {group['rows']}행 · {group['units']:,.0f}세대",
+        _dist("보증금", group["deposit"]),
+        _dist("월임대료", group["rent"]),
+    ]
+    per_m2 = [
+        f"{name} {format_won(d['median'])}"
+        for name, d in (("보증금", group["deposit_per_m2"]), ("월임대료", group["rent_per_m2"]))
+        if d is not None
+    ]
+    if per_m2:
+        parts.append("㎡당 중앙 " + ", ".join(per_m2))
+    if group["house_types"]:
+        parts.append("주택형 " + ", ".join(f"{t} {u:,.0f}세대" for t, u in group["house_types"]))
+    return " | ".join(parts)